@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, g
+from flask import Flask, Request, Response, request, jsonify, g, send_file
 from flask_cors import CORS
 import jwt
 import os
@@ -6,7 +6,41 @@ from dotenv import load_dotenv
 from pathlib import Path
 from functools import wraps
 from supabase import create_client, Client
-import requests
+from supabase.lib.client_options import SyncClientOptions
+import httpx
+from werkzeug.datastructures import FileStorage
+from werkzeug.formparser import default_stream_factory
+import time
+import hashlib
+import mimetypes
+import re
+import json
+import base64
+import uuid
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import logs
+import metrics
+from cache import TTLCache
+from clients import LazyClient
+from upstream import (
+    Upstream, UpstreamError, error_status, with_deadline,
+    UPSTREAM_READ_TIMEOUT, UPSTREAM_WRITE_TIMEOUT, UPSTREAM_TRANSFER_TIMEOUT,
+)
+from storage_gateway import StorageGateway, is_safe_object_path
+from derivatives import DerivativePipeline, derivative_path, thumbnail_path
+from image_cache import DiskLRUCache, ObjectNotFound, IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES
+from search_index import SearchIndex, SEARCH_PAGE_SIZE
+from trending import TrendingFeed, trending_args
+from upload_sessions import (
+    UploadSessions, SessionNotFound, SessionConflict,
+    UPLOAD_SESSION_CHUNK_BYTES, UPLOAD_SESSION_MIN_CHUNK_BYTES, UPLOAD_SESSION_MAX_CHUNK_BYTES,
+)
+from serialization import (
+    ARTIST_PROFILE_COLUMNS, ARTWORK_COLUMNS, ARTWORK_EXTRA_FIELDS, FEED_COLUMNS, FEED_EXTRA_FIELDS,
+    parse_fields, project, json_response,
+)
 
 env_path = Path(__file__).resolve().parent / '.env'
 load_dotenv(env_path)
@@ -21,12 +55,213 @@ SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')
 if not JWT_SECRET or not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
     raise ValueError("SUPABASE_JWT_SECRET, SUPABASE_URL, and SUPABASE_SERVICE_KEY must be set.")
 
-try:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
-    print("Supabase service client initialized.")
-except Exception as e:
-    print(f"Error initializing Supabase client: {e}")
-    supabase = None
+def _create_supabase() -> Client:
+    # PostgREST calls go through an httpx client whose event hooks time every request
+    return create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY, options=SyncClientOptions(
+        httpx_client=httpx.Client(http2=True, follow_redirects=True, timeout=120, event_hooks=with_deadline(metrics.httpx_event_hooks())),
+    ))
+
+
+# Every PostgREST and Storage call goes through one of these for admission control,
+# deadlines and retries (upstream.py). Overload surfaces as 503, timeouts as 504.
+db_upstream = Upstream('postgrest')
+storage_upstream = Upstream('storage')
+
+# Built on first use in each worker process (see clients.py and init_worker below)
+supabase = LazyClient(_create_supabase, 'supabase')
+
+# Pooled keep-alive HTTP client for every Supabase Storage call
+storage_gateway = StorageGateway(SUPABASE_URL, SUPABASE_SERVICE_KEY, event_hooks=with_deadline(metrics.httpx_event_hooks()))
+
+
+def _storage_error(resp):
+    return resp.status_code >= 500
+
+
+@app.errorhandler(UpstreamError)
+def upstream_error(e):
+    # Upstream overload/timeouts that escaped a route's own error handling
+    return jsonify({'message': 'Upstream service unavailable', 'error': str(e)}), e.status
+
+
+@app.after_request
+def _retry_after(response):
+    # Shed requests (and unready workers) tell clients when to come back
+    if response.status_code == 503 and 'Retry-After' not in response.headers:
+        response.headers['Retry-After'] = '1'
+    return response
+
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_latency(response):
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.http_request_duration.observe(
+            time.perf_counter() - started,
+            endpoint=endpoint, method=request.method, status=response.status_code,
+        )
+    return response
+
+# Uploads are streamed to storage in UPLOAD_CHUNK_SIZE pieces so an in-flight upload
+# holds at most one chunk in memory (Werkzeug spools the incoming file to disk).
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(256 * 1024)))
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(50 * 1024 * 1024)))
+# Reject oversized request bodies while Werkzeug is still reading them; the extra
+# megabyte leaves room for multipart boundaries and form fields.
+app.config['MAX_CONTENT_LENGTH'] = UPLOAD_MAX_BYTES + 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadStream:
+    """Iterate an uploaded file in fixed-size chunks, enforcing a byte limit as it goes."""
+
+    def __init__(self, stream, chunk_size=UPLOAD_CHUNK_SIZE, max_bytes=UPLOAD_MAX_BYTES):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def __iter__(self):
+        while True:
+            chunk = self.stream.read(self.chunk_size)
+            if not chunk:
+                break
+            self.bytes_read += len(chunk)
+            if self.bytes_read > self.max_bytes:
+                raise UploadTooLarge(f'upload exceeds {self.max_bytes} bytes')
+            yield chunk
+
+
+class HashingSpool:
+    """Spool for an uploaded file part that SHA-256 hashes the bytes as the multipart
+    parser writes them, so the digest is ready as soon as the body has been read."""
+
+    def __init__(self, inner):
+        self._inner = inner
+        self._hash = hashlib.sha256()
+
+    def write(self, data):
+        self._hash.update(data)
+        return self._inner.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def __iter__(self):
+        return iter(self._inner)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+
+def hashing_stream_factory(total_content_length, content_type, filename, content_length=None):
+    stream = default_stream_factory(total_content_length, content_type, filename, content_length)
+    # Only file parts are hashed; plain form fields never reach the stream factory with a filename
+    return HashingSpool(stream) if filename else stream
+
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return hashing_stream_factory(total_content_length, content_type, filename, content_length)
+
+
+app.request_class = UploadRequest
+
+
+def content_digest(file):
+    """Hex SHA-256 of an uploaded file, from the parse-time hash when available."""
+    stream = file.stream
+    if isinstance(stream, HashingSpool):
+        return stream.hexdigest()
+    h = hashlib.sha256()
+    pos = stream.tell()
+    for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+        h.update(chunk)
+    stream.seek(pos)
+    return h.hexdigest()
+
+
+def content_addressed_path(user_id, digest, filename):
+    # <user_id>/<sha256>.<ext>: identical bytes from one creator map to one object
+    ext = os.path.splitext(filename or '')[1].lower()
+    if not (1 < len(ext) <= 6 and ext[1:].isalnum()):
+        ext = ''
+    return f"{user_id}/{digest}{ext}"
+
+
+def _file_size(stream):
+    # Size of a seekable upload without reading it, or None
+    try:
+        pos = stream.tell()
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell() - pos
+        stream.seek(pos)
+        return size
+    except Exception:
+        return None
+
+
+def _stream_upload(method, bucket, object_path, file, log_prefix, token=None):
+    """Send an uploaded file to storage chunk by chunk through the storage gateway.
+    Raises UploadTooLarge if the file is over UPLOAD_MAX_BYTES.
+    Returns the storage response.
+    """
+    size = _file_size(file.stream)
+    if size is not None and size > UPLOAD_MAX_BYTES:
+        raise UploadTooLarge(f'upload exceeds {UPLOAD_MAX_BYTES} bytes')
+
+    body = UploadStream(file.stream)
+    started = time.perf_counter()
+    resp = storage_upstream.call(
+        lambda: storage_gateway.upload(method, bucket, object_path, body, content_type=file.content_type, token=token, size=size),
+        timeout=UPSTREAM_TRANSFER_TIMEOUT, op='upload',
+    )
+    elapsed = time.perf_counter() - started
+    mb_per_s = (body.bytes_read / (1024 * 1024)) / elapsed if elapsed > 0 else 0.0
+    logs.hot_info('upload.streamed', prefix=log_prefix, bucket=bucket, bytes=body.bytes_read,
+              seconds=round(elapsed, 4), mb_per_s=round(mb_per_s, 2), status=resp.status_code)
+    return resp
+
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({'message': f'File too large (max {UPLOAD_MAX_BYTES} bytes)'}), 413
+
+
+# Verified JWT payloads, keyed by a hash of the token and kept until the token's own
+# exp, so a bearer token reused across many requests is only verified once.
+jwt_cache = TTLCache(maxsize=int(os.getenv('JWT_CACHE_SIZE', '4096')))
+
+
+def _verify_token(token):
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = jwt_cache.get(key)
+    if payload is not None:
+        return payload
+
+    # Raises ExpiredSignatureError / InvalidTokenError; expired entries have already
+    # dropped out of the cache, so expiry is still reported at the boundary.
+    payload = jwt.decode(
+        token,
+        JWT_SECRET,
+        algorithms=['HS256'],
+        audience='authenticated',
+        issuer=f'{SUPABASE_URL}/auth/v1'
+    )
+    exp = payload.get('exp')
+    if isinstance(exp, (int, float)):
+        jwt_cache.set(key, payload, expires_at=exp)
+    return payload
+
 
 def token_required(f):
     @wraps(f)
@@ -42,13 +277,7 @@ def token_required(f):
             return jsonify({'message': 'Token is missing!'}), 401
 
         try:
-            payload = jwt.decode(
-                token,
-                JWT_SECRET,
-                algorithms=['HS256'],
-                audience='authenticated',
-                issuer=f'{SUPABASE_URL}/auth/v1'
-            )
+            payload = _verify_token(token)
             g.user = payload
             g.token = token
         except jwt.ExpiredSignatureError:
@@ -59,6 +288,188 @@ def token_required(f):
         return f(*args, **kwargs)
     return decorated
 
+
+CREATOR_ONLY_MESSAGE = 'Forbidden: only users with Creator user_type may upload'
+
+
+def is_creator(profile):
+    return isinstance(profile, dict) and profile.get('user_type') == 'creator'
+
+
+def creator_required(f):
+    # Goes under token_required; leaves the caller's profile in g.profile
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        user_id = g.user.get('sub')
+        try:
+            profile = get_cached_profile(user_id)
+        except Exception as e:
+            logs.error('upload.role_check_failed', endpoint=request.endpoint, user_id=user_id, error=str(e))
+            return jsonify({'message': 'Error verifying user role', 'error': str(e)}), error_status(e)
+        if not is_creator(profile):
+            logs.info('upload.forbidden', endpoint=request.endpoint, user_id=user_id,
+                      user_type=profile.get('user_type') if isinstance(profile, dict) else None)
+            return jsonify({'message': CREATOR_ONLY_MESSAGE}), 403
+        g.profile = profile
+        return f(*args, **kwargs)
+    return decorated
+
+# Profiles keyed by ('id', user_id) and resolved artist pages keyed by ('artist', handle).
+# Concurrent misses for one key share a single upstream query; writes that change a
+# profile or its artworks refresh/invalidate the affected entries.
+PROFILE_CACHE_TTL = float(os.getenv('PROFILE_CACHE_TTL', '30'))
+profile_cache = TTLCache(maxsize=int(os.getenv('PROFILE_CACHE_SIZE', '4096')), ttl=PROFILE_CACHE_TTL)
+
+
+def get_cached_profile(user_id):
+    def load():
+        resp = db_upstream.call(
+            lambda: supabase.table('profiles').select('*').eq('id', user_id).limit(1).execute(),
+            idempotent=True, op='profile',
+        )
+        return _parse_resp_single(resp)
+    return profile_cache.get_or_load(('id', user_id), load)
+
+
+def invalidate_artist_pages(profile):
+    # A resolver entry may be keyed by any of the identifiers a profile can be looked up by
+    if not isinstance(profile, dict):
+        return
+    for ident in (profile.get('id'), profile.get('handle'), profile.get('username')):
+        if ident:
+            profile_cache.delete(('artist', ident))
+
+
+# Conditional GET for /profile and /artist-resolver. ETags are derived from row
+# versions (updated_at, else created_at) and the artwork count, and are computed
+# from the cached rows, so a matching If-None-Match gets a 304 without a query or
+# a serialized body. See migrations/add_updated_at_columns.sql.
+RESOLVER_MAX_AGE = int(os.getenv('RESOLVER_MAX_AGE', '30'))
+RESOLVER_S_MAXAGE = int(os.getenv('RESOLVER_S_MAXAGE', '60'))
+RESOLVER_CACHE_CONTROL = (
+    f'public, max-age={RESOLVER_MAX_AGE}, s-maxage={RESOLVER_S_MAXAGE}, '
+    f'stale-while-revalidate={RESOLVER_S_MAXAGE}'
+)
+# Per-user data: browsers may keep it but must revalidate, shared caches may not store it
+PROFILE_CACHE_CONTROL = 'private, no-cache'
+
+
+def _make_etag(*parts):
+    raw = json.dumps(parts, default=str, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def profile_etag(profile):
+    version = profile.get('updated_at')
+    if version is None:
+        # Before the updated_at migration, fall back to the (small) row itself
+        version = profile
+    return _make_etag('profile', profile.get('id'), version)
+
+
+def artist_page_etag(resolved):
+    profile = resolved.get('profile')
+    artworks = resolved.get('artworks') or []
+    versions = [a.get('updated_at') or a.get('created_at') for a in artworks if isinstance(a, dict)]
+    return _make_etag(
+        'artist',
+        profile_etag(profile) if isinstance(profile, dict) else None,
+        len(artworks),
+        max((v for v in versions if v), default=None),
+    )
+
+
+def conditional_headers(etag, cache_control):
+    return {'ETag': f'"{etag}"', 'Cache-Control': cache_control}
+
+
+def resolve_artist_args(handle):
+    return {
+        'p_handle': handle,
+        'p_profile_columns': list(ARTIST_PROFILE_COLUMNS),
+        'p_artwork_columns': list(ARTWORK_COLUMNS),
+    }
+
+
+def artist_page(data):
+    """Normalize a resolve_artist result into the cached page:
+    {'profile', 'artworks', 'etag'}, with thumbnail_path set on each artwork once
+    here so responses can be encoded from the cached rows without copying them.
+    """
+    if isinstance(data, list):
+        data = data[0] if data else None
+    if not isinstance(data, dict):
+        data = {}
+    artworks = [a for a in (data.get('artworks') or []) if isinstance(a, dict)]
+    for a in artworks:
+        a['thumbnail_path'] = thumbnail_path(a)
+    page = {'profile': data.get('profile'), 'artworks': artworks}
+    page['etag'] = artist_page_etag(page)
+    return page
+
+
+def _store_derivatives(context, renders):
+    """Upload rendered variants and record their paths on the artworks row."""
+    image_url = context['image_url']
+    paths = {}
+    for width, fmt, content in renders:
+        path = derivative_path(image_url, width, fmt)
+        resp = storage_upstream.call(
+            lambda: storage_gateway.upload('POST', 'artworks', path, content, content_type=f'image/{fmt}', upsert=True),
+            timeout=UPSTREAM_TRANSFER_TIMEOUT, queue_timeout=UPSTREAM_TRANSFER_TIMEOUT, op='derivative_upload',
+        )
+        if not resp.is_success:
+            logs.warning('derivatives.upload_failed', path=path, status=resp.status_code)
+            continue
+        paths.setdefault(fmt, {})[str(width)] = path
+
+    if paths:
+        db_upstream.call(
+            lambda: supabase.table('artworks').update({'derivatives': paths}).eq('id', context['artwork_id']).execute(),
+            timeout=UPSTREAM_WRITE_TIMEOUT, queue_timeout=UPSTREAM_WRITE_TIMEOUT, op='derivatives_update',
+        )
+        invalidate_artist_pages(context.get('profile'))
+
+
+derivative_pipeline = DerivativePipeline(_store_derivatives)
+
+
+SEARCH_COLUMNS = 'id,user_id,title,image_url,tags,is_public,created_at,username,handle,derivatives'
+
+
+def _load_search_rows():
+    # Keyset-paged scan of public artworks for (re)building the search index
+    last_id = None
+    while True:
+        query = supabase.table('artworks_with_username').select(SEARCH_COLUMNS).eq('is_public', True)
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        page = query.order('id').limit(SEARCH_PAGE_SIZE)
+        resp = db_upstream.call(page.execute, idempotent=True, queue_timeout=UPSTREAM_READ_TIMEOUT, op='search_rows')
+        rows = getattr(resp, 'data', None) or []
+        for row in rows:
+            row['thumbnail_path'] = thumbnail_path(row)
+            yield row
+        if len(rows) < SEARCH_PAGE_SIZE:
+            return
+        last_id = rows[-1]['id']
+
+
+def index_artworks(rows, profile):
+    # Make freshly inserted artworks searchable without waiting for the next rebuild
+    for row in rows or []:
+        if isinstance(row, dict):
+            search_index.add(dict(
+                row,
+                username=profile.get('username') if isinstance(profile, dict) else None,
+                handle=profile.get('handle') if isinstance(profile, dict) else None,
+                thumbnail_path=thumbnail_path(row),
+            ))
+
+
+search_index = SearchIndex(_load_search_rows)
+
+
 @app.route('/')
 def hello_world():
     return 'Hello, World!'
@@ -76,36 +487,85 @@ def status():
     }), 200
 
 
+def _parse_tags(raw):
+    # Tags may be provided as a comma-separated string or a list. Convert to list (trimmed, skip empty).
+    if isinstance(raw, (list, tuple)):
+        return [str(t).strip() for t in raw if str(t).strip()]
+    return [t.strip() for t in (raw or '').split(',') if t.strip()]
+
+
+def _artwork_payload(user_id, object_path, meta, digest=None):
+    insert_payload = {
+        'user_id': user_id,
+        'title': meta.get('title') or 'Untitled',
+        'description': meta.get('description') or '',
+        'image_url': object_path,
+        'is_public': True
+    }
+    if digest:
+        insert_payload['content_sha256'] = digest
+    # If tags were provided, include them. The table should have a `tags` column (text[] or json).
+    tags = _parse_tags(meta.get('tags'))
+    if tags:
+        insert_payload['tags'] = tags
+    return insert_payload
+
+
+def find_stored_blob(user_id, digest):
+    # Digest index (idx_artworks_user_id_content_sha256): an earlier artwork by this
+    # creator with the same bytes, whose object can be reused instead of re-uploaded
+    query = (
+        supabase.table('artworks')
+        .select('image_url,derivatives')
+        .eq('user_id', user_id)
+        .eq('content_sha256', digest)
+        .limit(1)
+    )
+    return _parse_resp_single(db_upstream.call(query.execute, idempotent=True, op='find_blob'))
+
+
+def _store_blob(user_id, digest, file, log_prefix, token):
+    """Write an upload to its content-addressed path, or reuse the object when
+    this creator already stored the same bytes. Returns (object_path, existing
+    row or None, storage response or None when nothing was written)."""
+    try:
+        existing = find_stored_blob(user_id, digest)
+    except Exception as e:
+        # The index is an optimization; fall back to writing the object
+        logs.warning('upload.dedup_lookup_failed', user_id=user_id, error=str(e))
+        existing = None
+    if existing and existing.get('image_url'):
+        # Same bytes already stored: reuse the object and its derivatives, skip the write
+        logs.info('upload.deduplicated', user_id=user_id, object_path=existing['image_url'])
+        return existing['image_url'], existing, None
+    object_path = content_addressed_path(user_id, digest, file.filename)
+    logs.hot_debug('upload.start', user_id=user_id, object_path=object_path)
+    # Upload to Supabase Storage using the user's JWT so the storage owner is the user
+    return object_path, None, _stream_upload('PUT', 'artworks', object_path, file, log_prefix, token=token)
+
+
+def _discard_blob(user_id, digest, object_path):
+    # Best effort: remove an object this request wrote when its artworks row could
+    # not be inserted, unless another upload of the same bytes now refers to it
+    try:
+        if find_stored_blob(user_id, digest) is None:
+            storage_upstream.call(lambda: storage_gateway.delete('artworks', object_path),
+                                  timeout=UPSTREAM_WRITE_TIMEOUT, op='delete')
+            logs.info('upload.blob_discarded', user_id=user_id, object_path=object_path)
+    except Exception as e:
+        logs.warning('upload.blob_discard_failed', object_path=object_path, error=str(e))
+
+
 @app.route('/upload', methods=['POST'])
 @token_required
+@creator_required
 def upload_artwork():
     if not supabase:
         return jsonify({'message': 'Database client not initialized'}), 500
 
     user_id = g.user.get('sub')
-    token = getattr(g, 'token', None)
-    if not token:
-        return jsonify({'message': 'Missing user token'}), 401
-
-    # Ensure user has Creator user_type
-    try:
-        profile_resp = supabase.table('profiles').select('user_type').eq('id', user_id).single().execute()
-        profile_data = getattr(profile_resp, 'data', None) or (profile_resp[0] if isinstance(profile_resp, (list, tuple)) and len(profile_resp) > 0 else None)
-        profile_err = getattr(profile_resp, 'error', None) or (profile_resp[1] if isinstance(profile_resp, (list, tuple)) and len(profile_resp) > 1 else None)
-        if profile_err:
-            print(f"[upload] error fetching profile user_type: {profile_err}")
-            return jsonify({'message': 'Failed to verify user role', 'error': str(profile_err)}), 500
-
-        user_type = None
-        if isinstance(profile_data, dict):
-            user_type = profile_data.get('user_type')
-
-        if user_type != 'creator':
-            print(f"[upload] user {user_id} not authorized to upload (user_type={user_type})")
-            return jsonify({'message': 'Forbidden: only users with Creator user_type may upload'}), 403
-    except Exception as e:
-        print(f"[upload] exception checking user_type: {e}")
-        return jsonify({'message': 'Error verifying user role', 'error': str(e)}), 500
+    token = g.token
+    profile_data = g.profile
 
     if 'file' not in request.files:
         return jsonify({'message': 'No file part in request'}), 400
@@ -115,59 +575,307 @@ def upload_artwork():
     if not filename:
         return jsonify({'message': 'File must have a filename'}), 400
 
-    object_path = f"{user_id}/{filename}"
-
-    # Upload to Supabase Storage using the user's JWT so the storage owner is the user
-    upload_url = f"{SUPABASE_URL}/storage/v1/object/artworks/{object_path}"
-
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'apikey': SUPABASE_SERVICE_KEY,
-        'Content-Type': file.content_type or 'application/octet-stream'
-    }
-
+    digest = content_digest(file)
     try:
-        print(f"[upload] user_id={user_id} filename={filename} object_path={object_path}")
-        print(f"[upload] upload_url={upload_url}")
-        print(f"[upload] request.files keys={list(request.files.keys())}")
-        resp = requests.put(upload_url, data=file.read(), headers=headers)
-        print(f"[upload] storage response status={resp.status_code} text={resp.text}")
-        if not resp.ok:
+        object_path, existing, resp = _store_blob(user_id, digest, file, '[upload]', token)
+        if resp is not None and not resp.is_success:
             return jsonify({'message': 'Failed to upload to storage', 'status_code': resp.status_code, 'body': resp.text}), 500
+    except UploadTooLarge as e:
+        return jsonify({'message': 'File too large', 'error': str(e)}), 413
     except Exception as e:
-        print(f"[upload] exception during upload: {e}")
-        return jsonify({'message': 'Error uploading to storage', 'error': str(e)}), 500
-
-    title = request.form.get('title') or 'Untitled'
-    description = request.form.get('description') or ''
-    # Tags may be provided as a comma-separated string. Convert to list (trimmed, skip empty).
-    tags_raw = request.form.get('tags') or ''
-    tags = [t.strip() for t in tags_raw.split(',') if t.strip()]
-
-    try:
-        insert_payload = {
-            'user_id': user_id,
-            'title': title,
-            'description': description,
-            'image_url': object_path,
-            'is_public': True
-        }
-        # If tags were provided, include them. The table should have a `tags` column (text[] or json).
-        if tags:
-            insert_payload['tags'] = tags
-
-        insert_resp = supabase.table('artworks').insert(insert_payload).execute()
-
-        print(f"[upload] insert_resp: {insert_resp}")
+        logs.error('upload.storage_failed', user_id=user_id, error=str(e))
+        return jsonify({'message': 'Error uploading to storage', 'error': str(e)}), error_status(e)
+
+    try:
+        insert_payload = _artwork_payload(user_id, object_path, request.form, digest=digest)
+        if existing and existing.get('derivatives'):
+            insert_payload['derivatives'] = existing['derivatives']
+        insert_resp = db_upstream.call(supabase.table('artworks').insert(insert_payload).execute,
+                                       timeout=UPSTREAM_WRITE_TIMEOUT, op='insert_artwork')
+
         data = getattr(insert_resp, 'data', None) or (insert_resp[0] if isinstance(insert_resp, (list, tuple)) and len(insert_resp) > 0 else None)
         err = getattr(insert_resp, 'error', None) or (insert_resp[1] if isinstance(insert_resp, (list, tuple)) and len(insert_resp) > 1 else None)
         if err:
-            print(f"[upload] insert error: {err}")
+            logs.error('upload.insert_failed', object_path=object_path, error=str(err))
+            if resp is not None:
+                _discard_blob(user_id, digest, object_path)
             return jsonify({'message': 'Failed to insert artwork record', 'error': str(err)}), 500
 
-        return jsonify({'message': 'Uploaded', 'row': data}), 201
+        # New artwork changes this creator's public page
+        invalidate_artist_pages(profile_data)
+        index_artworks(getattr(insert_resp, 'data', None), profile_data)
+
+        # Resized variants are produced off the request path
+        row = _parse_resp_single(insert_resp)
+        if isinstance(row, dict) and row.get('id') and not insert_payload.get('derivatives'):
+            try:
+                derivative_pipeline.submit(file.stream, {'artwork_id': row['id'], 'image_url': object_path, 'profile': profile_data})
+            except Exception as e:
+                logs.warning('upload.derivatives_not_queued', object_path=object_path, error=str(e))
+
+        return jsonify({'message': 'Uploaded', 'row': data, 'deduplicated': existing is not None}), 201
     except Exception as e:
-        return jsonify({'message': 'Error inserting artwork', 'error': str(e)}), 500
+        logs.error('upload.insert_failed', object_path=object_path, error=str(e))
+        if resp is not None:
+            _discard_blob(user_id, digest, object_path)
+        return jsonify({'message': 'Error inserting artwork', 'error': str(e)}), error_status(e)
+
+
+UPLOAD_BATCH_MAX_FILES = int(os.getenv('UPLOAD_BATCH_MAX_FILES', '100'))
+UPLOAD_BATCH_MAX_BYTES = int(os.getenv('UPLOAD_BATCH_MAX_BYTES', str(1024 * 1024 * 1024)))
+UPLOAD_BATCH_WORKERS = int(os.getenv('UPLOAD_BATCH_WORKERS', '8'))
+upload_batch_pool = ThreadPoolExecutor(max_workers=UPLOAD_BATCH_WORKERS, thread_name_prefix='upload-batch')
+
+
+@app.route('/upload/batch', methods=['POST'])
+@token_required
+@creator_required
+def upload_artwork_batch():
+    """Upload a series of artworks in one multipart request.
+    Form fields: files=<file> (repeated), metadata=<JSON list of {title, description, tags}
+    in the same order as the files; optional>
+    Returns JSON: { results: [{filename, ok, row, deduplicated | error}] } with 201 if every file
+    was stored, 207 if only some were.
+    """
+    if not supabase:
+        return jsonify({'message': 'Database client not initialized'}), 500
+
+    user_id = g.user.get('sub')
+    token = g.token
+    profile_data = g.profile
+
+    # The batch body may be much larger than a single upload
+    request.max_content_length = UPLOAD_BATCH_MAX_BYTES
+    files = request.files.getlist('files')
+    if not files:
+        return jsonify({'message': 'No files in request'}), 400
+    if len(files) > UPLOAD_BATCH_MAX_FILES:
+        return jsonify({'message': f'At most {UPLOAD_BATCH_MAX_FILES} files per batch'}), 400
+
+    try:
+        metadata = json.loads(request.form.get('metadata') or '[]')
+    except ValueError:
+        return jsonify({'message': 'metadata must be a JSON list'}), 400
+    if not isinstance(metadata, list):
+        return jsonify({'message': 'metadata must be a JSON list'}), 400
+
+    results = [{'filename': f.filename, 'ok': False} for f in files]
+    pending = {}
+    writes = {}
+    for i, file in enumerate(files):
+        if not file.filename:
+            results[i]['error'] = 'File must have a filename'
+            continue
+        digest = content_digest(file)
+        if digest not in writes:
+            # Dedup lookups and storage writes run concurrently, bounded by
+            # UPLOAD_BATCH_WORKERS; identical files in one batch are written once
+            writes[digest] = upload_batch_pool.submit(_store_blob, user_id, digest, file, '[upload-batch]', token)
+        pending[i] = (digest, writes[digest])
+
+    payloads = []
+    uploaded = []
+    deduplicated = set()
+    for i, (digest, future) in pending.items():
+        try:
+            object_path, existing, resp = future.result()
+            if resp is not None and not resp.is_success:
+                results[i]['error'] = f'Failed to upload to storage (status {resp.status_code})'
+                continue
+        except Exception as e:
+            results[i]['error'] = str(e)
+            continue
+        meta = metadata[i] if i < len(metadata) and isinstance(metadata[i], dict) else {}
+        payload = _artwork_payload(user_id, object_path, meta, digest=digest)
+        if existing and existing.get('derivatives'):
+            payload['derivatives'] = existing['derivatives']
+        payloads.append(payload)
+        uploaded.append(i)
+        if existing:
+            deduplicated.add(i)
+
+    if payloads:
+        try:
+            # One bulk insert for every stored file
+            insert_resp = db_upstream.call(supabase.table('artworks').insert(payloads).execute,
+                                           timeout=UPSTREAM_WRITE_TIMEOUT, op='insert_artworks')
+            rows = getattr(insert_resp, 'data', None) or []
+            # Rows come back in insert order; several may share one object
+            for n, (i, payload) in enumerate(zip(uploaded, payloads)):
+                object_path = payload['image_url']
+                row = rows[n] if n < len(rows) else None
+                results[i].update(ok=True, row=row, deduplicated=i in deduplicated)
+                if isinstance(row, dict) and row.get('id') and not payload.get('derivatives'):
+                    try:
+                        derivative_pipeline.submit(files[i].stream, {'artwork_id': row['id'], 'image_url': object_path, 'profile': profile_data})
+                    except Exception as e:
+                        logs.warning('upload_batch.derivatives_not_queued', object_path=object_path, error=str(e))
+            invalidate_artist_pages(profile_data)
+            index_artworks(rows, profile_data)
+        except Exception as e:
+            logs.error('upload_batch.insert_failed', user_id=user_id, files=len(payloads), error=str(e))
+            for i in uploaded:
+                results[i]['error'] = f'Error inserting artwork: {e}'
+
+    stored = sum(1 for r in results if r['ok'])
+    status = 201 if stored == len(results) else 207
+    return jsonify({'message': f'Uploaded {stored} of {len(results)} files', 'results': results}), status
+
+
+# Resumable uploads: create a session, PUT numbered chunks (in any order, in
+# parallel, retried as needed), check which byte ranges have arrived, then
+# complete. Chunks are staged on local disk (upload_sessions.py); completing
+# assembles them and goes through the same dedup/store/insert steps as /upload.
+upload_sessions = UploadSessions()
+
+
+def _session_state(session):
+    received = upload_sessions.received(session)
+    missing = sorted(set(range(session['chunks'])) - set(received))
+    return {
+        'upload_id': session['id'],
+        'filename': session['filename'],
+        'size': session['size'],
+        'chunk_size': session['chunk_size'],
+        'chunks': session['chunks'],
+        'received_chunks': received,
+        'received_ranges': upload_sessions.received_ranges(session, received),
+        'missing_chunks': missing,
+        'complete': not missing,
+    }
+
+
+@app.route('/upload/sessions', methods=['POST'])
+@token_required
+@creator_required
+def create_upload_session():
+    """Start a resumable upload.
+    JSON body: { filename, size, content_type?, chunk_size?, title?, description?, tags? }
+    Returns JSON: { upload_id, chunk_size, chunks, ... } (see GET /upload/sessions/<id>)
+    """
+    user_id = g.user.get('sub')
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({'message': 'Request body must be a JSON object'}), 400
+    filename = body.get('filename')
+    if not filename or not isinstance(filename, str):
+        return jsonify({'message': 'filename is required'}), 400
+    try:
+        size = int(body.get('size'))
+        chunk_size = int(body.get('chunk_size') or UPLOAD_SESSION_CHUNK_BYTES)
+    except (TypeError, ValueError):
+        return jsonify({'message': 'size and chunk_size must be integers'}), 400
+    if not 0 < size <= UPLOAD_MAX_BYTES:
+        return jsonify({'message': f'size must be between 1 and {UPLOAD_MAX_BYTES} bytes'}), 413 if size > 0 else 400
+    if not UPLOAD_SESSION_MIN_CHUNK_BYTES <= chunk_size <= UPLOAD_SESSION_MAX_CHUNK_BYTES:
+        return jsonify({'message': f'chunk_size must be between {UPLOAD_SESSION_MIN_CHUNK_BYTES} and {UPLOAD_SESSION_MAX_CHUNK_BYTES}'}), 400
+
+    meta = {k: body.get(k) for k in ('title', 'description', 'tags') if body.get(k) is not None}
+    session = upload_sessions.create(user_id, filename, size, body.get('content_type'), chunk_size, meta)
+    return jsonify(_session_state(session)), 201
+
+
+@app.route('/upload/sessions/<session_id>', methods=['GET'])
+@token_required
+def get_upload_session(session_id):
+    """Which chunks / byte ranges of a resumable upload have been received."""
+    try:
+        session = upload_sessions.get(session_id, g.user.get('sub'))
+        return jsonify(_session_state(session)), 200
+    except SessionNotFound:
+        return jsonify({'message': 'Upload session not found'}), 404
+    except SessionConflict as e:
+        return jsonify({'message': str(e)}), 409
+
+
+@app.route('/upload/sessions/<session_id>/chunks/<int:index>', methods=['PUT'])
+@token_required
+def put_upload_chunk(session_id, index):
+    """Store chunk `index` (0-based) of a resumable upload; the body is the raw bytes.
+    Re-sending a chunk replaces it.
+    """
+    try:
+        session = upload_sessions.get(session_id, g.user.get('sub'))
+        written = upload_sessions.write_chunk(session, index, request.stream)
+    except SessionNotFound:
+        return jsonify({'message': 'Upload session not found'}), 404
+    except SessionConflict as e:
+        return jsonify({'message': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    logs.hot_debug('upload_session.chunk', upload_id=session_id, index=index, bytes=written)
+    return jsonify({'upload_id': session_id, 'index': index, 'bytes': written}), 200
+
+
+@app.route('/upload/sessions/<session_id>', methods=['DELETE'])
+@token_required
+def abort_upload_session(session_id):
+    try:
+        upload_sessions.get(session_id, g.user.get('sub'))
+    except SessionNotFound:
+        return jsonify({'message': 'Upload session not found'}), 404
+    except SessionConflict as e:
+        return jsonify({'message': str(e)}), 409
+    upload_sessions.discard(session_id)
+    return '', 204
+
+
+@app.route('/upload/sessions/<session_id>/complete', methods=['POST'])
+@token_required
+def complete_upload_session(session_id):
+    """Assemble a fully received upload, store it and insert the artworks row.
+    Returns the same JSON as POST /upload. 409 lists missing chunks.
+    """
+    if not supabase:
+        return jsonify({'message': 'Database client not initialized'}), 500
+
+    user_id = g.user.get('sub')
+    token = g.token
+    try:
+        session = upload_sessions.get(session_id, user_id)
+        assembled, digest = upload_sessions.assemble(session)
+    except SessionNotFound:
+        return jsonify({'message': 'Upload session not found'}), 404
+    except SessionConflict as e:
+        return jsonify({'message': str(e)}), 409
+
+    try:
+        profile_data = get_cached_profile(user_id)
+        with open(assembled, 'rb') as stream:
+            file = FileStorage(stream=stream, filename=session['filename'], content_type=session.get('content_type'))
+            object_path, existing, resp = _store_blob(user_id, digest, file, '[upload-session]', token)
+            if resp is not None and not resp.is_success:
+                upload_sessions.release(session)
+                return jsonify({'message': 'Failed to upload to storage', 'status_code': resp.status_code, 'body': resp.text}), 502
+
+            insert_payload = _artwork_payload(user_id, object_path, session.get('meta') or {}, digest=digest)
+            if existing and existing.get('derivatives'):
+                insert_payload['derivatives'] = existing['derivatives']
+            insert_resp = db_upstream.call(supabase.table('artworks').insert(insert_payload).execute,
+                                           timeout=UPSTREAM_WRITE_TIMEOUT, op='insert_artwork')
+            data = getattr(insert_resp, 'data', None)
+            err = getattr(insert_resp, 'error', None) or (insert_resp[1] if isinstance(insert_resp, (list, tuple)) and len(insert_resp) > 1 else None)
+            if err:
+                logs.error('upload_session.insert_failed', upload_id=session_id, object_path=object_path, error=str(err))
+                upload_sessions.release(session)
+                return jsonify({'message': 'Failed to insert artwork record', 'error': str(err)}), 500
+
+            invalidate_artist_pages(profile_data)
+            index_artworks(data, profile_data)
+            row = _parse_resp_single(insert_resp)
+            if isinstance(row, dict) and row.get('id') and not insert_payload.get('derivatives'):
+                try:
+                    # Copies the assembled file before returning, so the session can go
+                    derivative_pipeline.submit(stream, {'artwork_id': row['id'], 'image_url': object_path, 'profile': profile_data})
+                except Exception as e:
+                    logs.warning('upload.derivatives_not_queued', object_path=object_path, error=str(e))
+    except Exception as e:
+        logs.error('upload_session.complete_failed', upload_id=session_id, error=str(e))
+        upload_sessions.release(session)
+        return jsonify({'message': 'Error completing upload', 'error': str(e)}), error_status(e)
+
+    upload_sessions.discard(session_id)
+    return jsonify({'message': 'Uploaded', 'row': data, 'deduplicated': existing is not None}), 201
 
 
 @app.route('/upload-avatar', methods=['POST'])
@@ -187,41 +895,101 @@ def upload_avatar():
         return jsonify({'message': 'File must have a filename'}), 400
 
     # Generate unique filename
-    import time
     file_ext = filename.split('.')[-1] if '.' in filename else 'jpg'
     object_path = f"{user_id}/{int(time.time() * 1000)}.{file_ext}"
 
-    # Upload to Supabase Storage using SERVICE role to bypass RLS
-    upload_url = f"{SUPABASE_URL}/storage/v1/object/avatars/{object_path}"
-
-    headers = {
-        'Authorization': f'Bearer {SUPABASE_SERVICE_KEY}',
-        'apikey': SUPABASE_SERVICE_KEY,
-        'Content-Type': file.content_type or 'application/octet-stream'
-    }
-
     try:
-        print(f"[upload-avatar] user_id={user_id} filename={filename} object_path={object_path}")
-        resp = requests.post(upload_url, data=file.read(), headers=headers)
-        print(f"[upload-avatar] storage response status={resp.status_code} text={resp.text}")
-        if not resp.ok:
+        logs.hot_debug('upload_avatar.start', user_id=user_id, object_path=object_path)
+        # Upload to Supabase Storage using SERVICE role to bypass RLS
+        resp = _stream_upload('POST', 'avatars', object_path, file, '[upload-avatar]')
+        if not resp.is_success:
             return jsonify({'message': 'Failed to upload to storage', 'status_code': resp.status_code, 'body': resp.text}), 500
+    except UploadTooLarge as e:
+        return jsonify({'message': 'File too large', 'error': str(e)}), 413
     except Exception as e:
-        print(f"[upload-avatar] exception during upload: {e}")
-        return jsonify({'message': 'Error uploading to storage', 'error': str(e)}), 500
+        logs.error('upload_avatar.storage_failed', object_path=object_path, error=str(e))
+        return jsonify({'message': 'Error uploading to storage', 'error': str(e)}), error_status(e)
 
     # Get public URL
     public_url = f"{SUPABASE_URL}/storage/v1/object/public/avatars/{object_path}"
 
     # Update user's profile with new avatar_url
     try:
-        update_resp = supabase.table('profiles').update({'avatar_url': public_url}).eq('id', user_id).execute()
-        print(f"[upload-avatar] profile update response: {update_resp}")
+        update_resp = db_upstream.call(
+            supabase.table('profiles').update({'avatar_url': public_url}).eq('id', user_id).execute,
+            timeout=UPSTREAM_WRITE_TIMEOUT, op='update_avatar',
+        )
+
+        # Write the updated row through to the cache and drop stale artist pages
+        updated = _parse_resp_single(update_resp)
+        invalidate_artist_pages(profile_cache.get(('id', user_id)))
+        if isinstance(updated, dict):
+            profile_cache.set(('id', user_id), updated)
+            invalidate_artist_pages(updated)
+        else:
+            profile_cache.delete(('id', user_id))
         
         return jsonify({'message': 'Avatar uploaded successfully', 'avatar_url': public_url}), 200
     except Exception as e:
-        print(f"[upload-avatar] error updating profile: {e}")
-        return jsonify({'message': 'Avatar uploaded but failed to update profile', 'error': str(e), 'avatar_url': public_url}), 500
+        logs.error('upload_avatar.profile_update_failed', user_id=user_id, error=str(e))
+        return jsonify({'message': 'Avatar uploaded but failed to update profile', 'error': str(e), 'avatar_url': public_url}), error_status(e)
+
+
+# Signed URLs are cached per (bucket, path, expiry bucket). Requested expiries are
+# rounded up to a multiple of SIGNED_URL_EXPIRY_STEP and URLs are issued with one
+# extra step of validity, so a cached URL can be reused for up to one step while
+# still covering the expiry every caller in that bucket asked for.
+SIGNED_URL_EXPIRY_STEP = max(int(os.getenv('SIGNED_URL_EXPIRY_STEP', '60')), 1)
+SIGNED_URL_MAX_BATCH = int(os.getenv('SIGNED_URL_MAX_BATCH', '500'))
+signed_url_cache = TTLCache(maxsize=int(os.getenv('SIGNED_URL_CACHE_SIZE', '10000')), ttl=SIGNED_URL_EXPIRY_STEP)
+
+
+def _expiry_bucket(expires):
+    step = SIGNED_URL_EXPIRY_STEP
+    return max(step, -(-expires // step) * step)
+
+
+def _cached_signed_urls(bucket, paths, expires):
+    # Split paths into cached results and the ones that still need signing
+    expiry_bucket = _expiry_bucket(expires)
+    results = {}
+    to_sign = []
+    for path in dict.fromkeys(paths):
+        url = signed_url_cache.get((bucket, path, expiry_bucket))
+        if url:
+            results[path] = {'signedURL': url, 'error': None}
+        else:
+            to_sign.append(path)
+    return results, to_sign
+
+
+def _remember_signed_urls(bucket, expires, to_sign, signed, results):
+    # Merge a batch signing response into results and the cache
+    expiry_bucket = _expiry_bucket(expires)
+    for item in signed:
+        path = item.get('path')
+        url = item.get('signedURL') or item.get('signedUrl')
+        err = item.get('error')
+        if url and not err:
+            signed_url_cache.set((bucket, path, expiry_bucket), url)
+        results[path] = {'signedURL': url, 'error': err}
+    for path in to_sign:
+        results.setdefault(path, {'signedURL': None, 'error': 'not signed'})
+
+
+def _sign_paths(bucket, paths, expires):
+    """Sign object paths in one bucket, reusing cached URLs where possible.
+    Paths missing from the cache are signed with a single batch call to storage.
+    Returns ({path: {'signedURL', 'error'}}, hits, misses).
+    """
+    results, to_sign = _cached_signed_urls(bucket, paths, expires)
+    if to_sign:
+        signed = storage_upstream.call(
+            lambda: storage_gateway.create_signed_urls(bucket, to_sign, _expiry_bucket(expires) + SIGNED_URL_EXPIRY_STEP),
+            idempotent=True, hedge=True, op='sign',
+        )
+        _remember_signed_urls(bucket, expires, to_sign, signed, results)
+    return results, len(results) - len(to_sign), len(to_sign)
 
 
 @app.route('/signed-url')
@@ -230,19 +998,276 @@ def signed_url():
     # Return a short-lived signed URL for an object path
     path = request.args.get('path')
     bucket = request.args.get('bucket') or 'artworks'
-    expires = int(request.args.get('expires') or 60)
+    try:
+        expires = int(request.args.get('expires') or 60)
+    except ValueError:
+        return jsonify({'message': 'expires must be an integer'}), 400
 
     if not path:
         return jsonify({'message': 'path query parameter required'}), 400
 
     try:
-        storage = supabase.storage
-        res = storage.from_(bucket).create_signed_url(path, expires)
-        if isinstance(res, dict):
-            return jsonify(res), 200
-        return jsonify({'signed_url': getattr(res, 'signed_url', None) or getattr(res, 'data', None)}), 200
+        results, _, _ = _sign_paths(bucket, [path], expires)
+        res = results[path]
+        if res.get('error') or not res.get('signedURL'):
+            return jsonify({'message': 'Failed to create signed url', 'error': str(res.get('error'))}), 500
+        return jsonify({'signedURL': res['signedURL'], 'signedUrl': res['signedURL']}), 200
+    except Exception as e:
+        return jsonify({'message': 'Failed to create signed url', 'error': str(e)}), error_status(e)
+
+
+@app.route('/signed-urls', methods=['POST'])
+@token_required
+def signed_urls():
+    """Sign many object paths, possibly across buckets, in one request.
+    Body: { items: [{bucket, path} | "path", ...], expires?: seconds, bucket?: default bucket }
+    Returns JSON: { signed_urls: [{bucket, path, signedURL, error}], cache: {hits, misses} }
+    """
+    if not supabase:
+        return jsonify({'message': 'Database client not initialized'}), 500
+
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({'message': 'Request body must be a JSON object'}), 400
+    items = body.get('items') or body.get('paths') or []
+    default_bucket = body.get('bucket') or 'artworks'
+    try:
+        expires = int(body.get('expires') or 60)
+    except (TypeError, ValueError):
+        return jsonify({'message': 'expires must be an integer'}), 400
+
+    if not isinstance(items, list) or not items:
+        return jsonify({'message': 'items must be a non-empty list'}), 400
+    if len(items) > SIGNED_URL_MAX_BATCH:
+        return jsonify({'message': f'at most {SIGNED_URL_MAX_BATCH} items per request'}), 400
+
+    requested = []
+    by_bucket = {}
+    for item in items:
+        if isinstance(item, str):
+            bucket, path = default_bucket, item
+        elif isinstance(item, dict):
+            bucket, path = item.get('bucket') or default_bucket, item.get('path')
+        else:
+            bucket, path = default_bucket, None
+        if not path:
+            return jsonify({'message': 'each item needs a path'}), 400
+        requested.append((bucket, path))
+        by_bucket.setdefault(bucket, []).append(path)
+
+    hits = misses = 0
+    signed = {}
+    try:
+        for bucket, paths in by_bucket.items():
+            results, h, m = _sign_paths(bucket, paths, expires)
+            hits += h
+            misses += m
+            for path, res in results.items():
+                signed[(bucket, path)] = res
     except Exception as e:
-        return jsonify({'message': 'Failed to create signed url', 'error': str(e)}), 500
+        return jsonify({'message': 'Failed to create signed urls', 'error': str(e)}), error_status(e)
+
+    out = []
+    for bucket, path in requested:
+        res = signed.get((bucket, path)) or {}
+        out.append({'bucket': bucket, 'path': path, 'signedURL': res.get('signedURL'), 'error': res.get('error')})
+    return jsonify({'signed_urls': out, 'cache': {'hits': hits, 'misses': misses}}), 200
+
+
+# Image proxy. Objects are kept in a size-bounded disk LRU (image_cache.py) and
+# sent from disk with Range/conditional support; under a server that implements
+# wsgi.file_wrapper with sendfile (e.g. gunicorn) the body never enters Python.
+IMAGE_PROXY_BUCKETS = tuple(b.strip() for b in os.getenv('IMAGE_PROXY_BUCKETS', 'artworks,avatars').split(',') if b.strip())
+# Browser/disk-cache lifetime for objects that may be overwritten in place
+IMAGE_MUTABLE_MAX_AGE = int(os.getenv('IMAGE_MUTABLE_MAX_AGE', '300'))
+IMAGE_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+_CONTENT_ADDRESSED = re.compile(r'(^|/)[0-9a-f]{64}(\.[A-Za-z0-9]+)?(/|$)')
+
+
+def _fetch_object(bucket, object_path, out):
+    def download():
+        # A retry starts the file over
+        out.seek(0)
+        out.truncate()
+        return storage_gateway.download(bucket, object_path, out)
+
+    resp = storage_upstream.call(download, timeout=UPSTREAM_TRANSFER_TIMEOUT, idempotent=True,
+                                 retry_if=_storage_error, op='download')
+    # Storage reports a missing object as 400 or 404 depending on version
+    if resp.status_code in (400, 404):
+        raise ObjectNotFound(f'{bucket}/{object_path}')
+    resp.raise_for_status()
+    return resp.headers.get('content-type')
+
+
+image_cache = DiskLRUCache(_fetch_object)
+
+
+def _is_immutable(bucket, object_path):
+    # Content-addressed originals and their derivatives never change; avatar paths
+    # are timestamped per upload
+    return bucket == 'avatars' or bool(_CONTENT_ADDRESSED.search(object_path))
+
+
+@app.route('/image/<bucket>/<path:object_path>')
+@token_required
+def image_proxy(bucket, object_path):
+    """Serve a storage object through the local disk cache.
+    Supports Range and If-None-Match / If-Modified-Since.
+    """
+    if bucket not in IMAGE_PROXY_BUCKETS:
+        return jsonify({'message': 'Unknown bucket'}), 404
+    if not is_safe_object_path(object_path):
+        return jsonify({'message': 'Object not found'}), 404
+
+    immutable = _is_immutable(bucket, object_path)
+    max_age = None if immutable else IMAGE_MUTABLE_MAX_AGE
+    try:
+        for attempt in range(2):
+            file_path, content_type = image_cache.get(bucket, object_path, max_age=max_age)
+            try:
+                resp = send_file(
+                    file_path,
+                    mimetype=content_type or mimetypes.guess_type(object_path)[0] or 'application/octet-stream',
+                    conditional=True,
+                    etag=True,
+                    max_age=None,
+                )
+                break
+            except FileNotFoundError:
+                # Evicted between lookup and open; fetch it again once
+                image_cache.discard(bucket, object_path)
+                if attempt:
+                    raise
+    except ObjectNotFound:
+        return jsonify({'message': 'Object not found'}), 404
+    except Exception as e:
+        logs.error('image_proxy.failed', bucket=bucket, path=object_path, error=str(e))
+        return jsonify({'message': 'Error fetching image', 'error': str(e)}), error_status(e, 502)
+
+    resp.headers['Accept-Ranges'] = 'bytes'
+    if immutable:
+        resp.headers['Cache-Control'] = f'private, max-age={IMAGE_IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        resp.headers['Cache-Control'] = f'private, max-age={IMAGE_MUTABLE_MAX_AGE}'
+    return resp
+
+
+@app.route('/cache-stats')
+@token_required
+def cache_stats():
+    return jsonify({
+        'signed_urls': signed_url_cache.stats(),
+        'jwt': jwt_cache.stats(),
+        'profiles': profile_cache.stats(),
+        'images': image_cache.stats(),
+    }), 200
+
+@metrics.register_collector
+def _cache_metrics():
+    caches = {'signed_urls': signed_url_cache, 'jwt': jwt_cache, 'profiles': profile_cache, 'images': image_cache}
+    lines = []
+    for field, kind in (('hits', 'counter'), ('misses', 'counter'), ('evictions', 'counter'), ('size', 'gauge')):
+        name = f'cache_{field}_total' if kind == 'counter' else f'cache_{field}'
+        lines.append(f'# TYPE {name} {kind}')
+        for cache_name, cache in caches.items():
+            lines.append(f'{name}{{cache="{cache_name}"}} {cache.stats()[field]}')
+    return lines
+
+
+# Per-process setup. Nothing here runs at import, so a preforking server can import
+# the app once in its master and fork workers that share those pages.
+PROCESS_STARTED = time.time()
+READY_CHECK_TTL = float(os.getenv('READY_CHECK_TTL', '5'))
+_worker_pid = None
+_readiness = TTLCache(maxsize=1, ttl=READY_CHECK_TTL)
+
+
+def init_worker(slot=None, workers=1):
+    """Build this process's clients and start its background jobs before the first
+    request arrives. Under gunicorn it runs in each worker right after fork
+    (gunicorn.conf.py); `slot` is the worker's stable number, which gives it an
+    image cache directory of its own, and IMAGE_CACHE_MAX_BYTES is shared out
+    between the `workers` caches. Other servers get it from the first request.
+    """
+    global _worker_pid
+    if _worker_pid == os.getpid():
+        return
+    _worker_pid = os.getpid()
+    started = time.perf_counter()
+    if slot is not None:
+        image_cache.root = f'{IMAGE_CACHE_DIR}-worker{slot}'
+        image_cache.max_bytes = IMAGE_CACHE_MAX_BYTES // max(1, workers)
+    # The loaders go through the lazy client and retry until their first load
+    # succeeds, so a client that cannot be built yet only delays them
+    search_index.start()
+    trending_feed.start()
+    try:
+        storage_gateway.client
+    except Exception as e:
+        logs.warning('worker.storage_client_failed', error=str(e))
+    logs.info('worker.initialized', pid=_worker_pid, slot=slot, seconds=round(time.perf_counter() - started, 4))
+
+
+@app.before_request
+def _ensure_worker():
+    if _worker_pid != os.getpid():
+        init_worker()
+
+
+@app.route('/healthz')
+def healthz():
+    # Liveness: the process is serving requests. No upstream calls, so a slow
+    # database never gets healthy workers restarted.
+    return jsonify({'status': 'ok', 'pid': os.getpid()}), 200
+
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: the database client is built and answers a one-row query, and
+    the search index and trending feed have loaded. The database probe is cached
+    for READY_CHECK_TTL seconds so frequent probes stay cheap.
+    Returns 503 while the worker should not be sent traffic.
+    """
+    def probe():
+        db_upstream.call(supabase.table('profiles').select('id').limit(1).execute, timeout=2, op='ready')
+        return True
+
+    checks = {'search_index': search_index.ready.is_set(), 'trending': trending_feed.ready.is_set()}
+    try:
+        _readiness.get_or_load('database', probe)
+        checks['database'] = 'ok'
+    except Exception as e:
+        checks['database'] = str(e)
+    ready = checks['database'] == 'ok' and checks['search_index'] and checks['trending']
+    return jsonify({
+        'status': 'ready' if ready else 'unavailable',
+        'checks': checks,
+        'pid': os.getpid(),
+        'uptime_seconds': round(time.time() - PROCESS_STARTED, 3),
+    }), 200 if ready else 503
+
+
+@metrics.register_collector
+def _upstream_metrics():
+    upstreams = {'postgrest': db_upstream, 'storage': storage_upstream}
+    stats = {name: u.stats() for name, u in upstreams.items()}
+    lines = []
+    for field, kind in (('in_flight', 'gauge'), ('waiting', 'gauge'), ('calls', 'counter'), ('shed', 'counter'),
+                        ('deadline_exceeded', 'counter'), ('retried', 'counter'), ('hedged', 'counter'),
+                        ('hedge_wins', 'counter'), ('hedge_declined', 'counter')):
+        name = f'upstream_{field}_total' if kind == 'counter' else f'upstream_{field}'
+        lines.append(f'# TYPE {name} {kind}')
+        for upstream_name, values in stats.items():
+            lines.append(f'{name}{{upstream="{upstream_name}"}} {values[field]}')
+    return lines
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Prometheus text exposition format
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
 
 # Fetches data from the 'profiles' table for the logged-in user
 @app.route('/profile', methods=['GET'])
@@ -255,16 +1280,374 @@ def get_profile():
     user_id = g.user.get('sub') 
 
     try:
-        response = supabase.table('profiles').select('*').eq('id', user_id).single().execute()
-        
-        if not response.data:
+        profile = get_cached_profile(user_id)
+
+        if not profile:
+            return jsonify({'message': 'Profile not found.'}), 404
+
+        etag = profile_etag(profile)
+        headers = conditional_headers(etag, PROFILE_CACHE_CONTROL)
+        if request.if_none_match.contains_weak(etag):
+            return '', 304, headers
+        return jsonify(profile), 200, headers
+
+    except Exception as e:
+        logs.error('profile.fetch_failed', user_id=user_id, error=str(e))
+        return jsonify({'message': 'Error fetching profile', 'error': str(e)}), error_status(e)
+
+
+FEED_DEFAULT_LIMIT = 24
+FEED_MAX_LIMIT = 100
+
+
+def _encode_cursor(row):
+    raw = json.dumps([row.get('created_at'), row.get('id')]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    # Both values end up inside a PostgREST filter string, so only a real
+    # timestamp and UUID (re-serialized) get through
+    padded = cursor + '=' * (-len(cursor) % 4)
+    created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if not isinstance(created_at, str) or not isinstance(row_id, str):
+        raise ValueError('malformed cursor')
+    return datetime.fromisoformat(created_at).isoformat(), str(uuid.UUID(row_id))
+
+
+def _newest_first(query, after, limit):
+    # Keyset page on (created_at, id), with one extra row to know whether another page exists
+    if after:
+        created_at, row_id = after
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")')
+    return query.order('created_at', desc=True).order('id', desc=True).limit(limit + 1)
+
+
+def _split_page(rows, limit):
+    # (rows of this page, cursor for the next page or None)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, _encode_cursor(rows[-1])
+    return rows, None
+
+
+def _viewer_artwork_ids(table, user_id, artwork_ids):
+    # Scoped to the viewer (idx_*_user_id) and to the current page only
+    query = supabase.table(table).select('artwork_id').eq('user_id', user_id).in_('artwork_id', artwork_ids)
+    resp = db_upstream.call(query.execute, idempotent=True, op=f'feed_{table}')
+    return {r.get('artwork_id') for r in (getattr(resp, 'data', None) or [])}
+
+
+# Trending: a background refresher ranks public artworks by time-decayed likes and
+# saves (migrations/create_trending_function.sql) and swaps in a pre-encoded
+# snapshot; requests only slice it.
+TRENDING_DEFAULT_LIMIT = 24
+TRENDING_MAX_LIMIT = 100
+TRENDING_READY_WAIT = float(os.getenv('TRENDING_READY_WAIT', '5'))
+TRENDING_CACHE_CONTROL = 'private, no-cache'
+
+
+def _load_trending():
+    resp = db_upstream.call(
+        supabase.rpc('trending_artworks', trending_args(FEED_COLUMNS)).execute,
+        idempotent=True, queue_timeout=UPSTREAM_READ_TIMEOUT, op='trending',
+    )
+    rows = [r for r in (getattr(resp, 'data', None) or []) if isinstance(r, dict)]
+    for r in rows:
+        r['thumbnail_path'] = thumbnail_path(r)
+    return rows
+
+
+trending_feed = TrendingFeed(_load_trending)
+
+
+@app.route('/feed/trending')
+@token_required
+def trending():
+    """Public artworks ranked by recent likes and saves, from the in-memory snapshot.
+    Query params: ?limit=<n>&offset=<n>
+    Returns JSON: { artworks: [... with score], total: int, next_offset: int | null, computed_at, version }
+    `version` changes whenever the ranking is recomputed.
+    """
+    try:
+        limit = int(request.args.get('limit') or TRENDING_DEFAULT_LIMIT)
+        offset = int(request.args.get('offset') or 0)
+    except ValueError:
+        return jsonify({'message': 'limit and offset must be integers'}), 400
+    limit = max(1, min(limit, TRENDING_MAX_LIMIT))
+    offset = max(0, offset)
+
+    if not trending_feed.ready.wait(TRENDING_READY_WAIT):
+        return jsonify({'message': 'Trending feed is still being computed'}), 503
+
+    snapshot = trending_feed.snapshot
+    etag = _make_etag('trending', snapshot.version, offset, limit)
+    headers = conditional_headers(etag, TRENDING_CACHE_CONTROL)
+    if request.if_none_match.contains_weak(etag):
+        return '', 304, headers
+    return Response(snapshot.page_json(offset, limit), status=200, headers=headers, mimetype='application/json')
+
+
+@app.route('/feed')
+@token_required
+def feed():
+    """Newest-first page of public artworks with the viewer's like/save state.
+    Keyset pagination on (created_at, id); pass back next_cursor to get the next page.
+    Query params: ?cursor=<opaque>&limit=<n>&fields=<comma-separated>
+    Returns JSON: { artworks: [{..., liked_by_me, saved_by_me}], next_cursor: str | null }
+    """
+    if not supabase:
+        return jsonify({'message': 'Database client not initialized'}), 500
+
+    user_id = g.user.get('sub')
+    try:
+        limit = int(request.args.get('limit') or FEED_DEFAULT_LIMIT)
+    except ValueError:
+        return jsonify({'message': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, FEED_MAX_LIMIT))
+
+    cursor = request.args.get('cursor')
+    after = None
+    if cursor:
+        try:
+            after = _decode_cursor(cursor)
+        except Exception:
+            return jsonify({'message': 'Invalid cursor'}), 400
+
+    try:
+        fields = parse_fields(request.args.get('fields'), FEED_COLUMNS + FEED_EXTRA_FIELDS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    if fields is None:
+        columns = FEED_COLUMNS
+    else:
+        # The cursor needs (created_at, id) and thumbnail_path is derived from derivatives
+        wanted = set(fields) | {'id', 'created_at'} | ({'derivatives'} if 'thumbnail_path' in fields else set())
+        columns = tuple(c for c in FEED_COLUMNS if c in wanted)
+
+    try:
+        query = (
+            supabase.table('artworks_with_username')
+            .select(','.join(columns))
+            .eq('is_public', True)
+        )
+        resp = db_upstream.call(_newest_first(query, after, limit).execute, idempotent=True, op='feed')
+        rows, next_cursor = _split_page(getattr(resp, 'data', None) or [], limit)
+
+        ids = [r.get('id') for r in rows if r.get('id') is not None]
+        liked = _viewer_artwork_ids('likes', user_id, ids) if ids else set()
+        saved = _viewer_artwork_ids('saves', user_id, ids) if ids else set()
+        for r in rows:
+            r['liked_by_me'] = r.get('id') in liked
+            r['saved_by_me'] = r.get('id') in saved
+            r['thumbnail_path'] = thumbnail_path(r)
+
+        return json_response(Response, {'artworks': project(rows, fields), 'next_cursor': next_cursor})
+    except Exception as e:
+        logs.error('feed.failed', user_id=user_id, error=str(e))
+        return jsonify({'message': 'Error fetching feed', 'error': str(e)}), error_status(e)
+
+
+# Profile page in one request: the profile plus pages of the user's uploads, likes and
+# saves, each artwork with its artist and signed image URLs. The lists are queried
+# concurrently (likes/saves embed their artworks and artists, so one round trip
+# each) and all images are signed with a single storage call.
+DASHBOARD_SECTIONS = ('uploaded', 'liked', 'saved')
+DASHBOARD_DEFAULT_LIMIT = 12
+DASHBOARD_MAX_LIMIT = 50
+DASHBOARD_SIGNED_URL_EXPIRES = int(os.getenv('DASHBOARD_SIGNED_URL_EXPIRES', '3600'))
+ARTIST_EMBED_COLUMNS = ('id', 'username', 'handle', 'avatar_url')
+dashboard_pool = ThreadPoolExecutor(max_workers=int(os.getenv('DASHBOARD_WORKERS', '32')), thread_name_prefix='dashboard')
+
+
+def _dashboard_uploaded(user_id, after, limit):
+    query = supabase.table('artworks').select(','.join(ARTWORK_COLUMNS)).eq('user_id', user_id)
+    resp = db_upstream.call(_newest_first(query, after, limit).execute, idempotent=True, op='dashboard_uploaded')
+    return _split_page(getattr(resp, 'data', None) or [], limit)
+
+
+def _dashboard_interactions(table, user_id, after, limit):
+    # Paged on the like/save rows (newest first), each with its artwork and artist
+    columns = f"id,created_at,artworks({','.join(ARTWORK_COLUMNS)},profiles({','.join(ARTIST_EMBED_COLUMNS)}))"
+    query = supabase.table(table).select(columns).eq('user_id', user_id)
+    resp = db_upstream.call(_newest_first(query, after, limit).execute, idempotent=True, op=f'dashboard_{table}')
+    rows, next_cursor = _split_page(getattr(resp, 'data', None) or [], limit)
+    artworks = []
+    for r in rows:
+        artwork = r.get('artworks')
+        # Deleted, or since made private by its artist
+        if not isinstance(artwork, dict) or (artwork.get('is_public') is False and artwork.get('user_id') != user_id):
+            continue
+        artist = artwork.pop('profiles', None)
+        artworks.append(dict(artwork, artist=artist, interacted_at=r.get('created_at')))
+    return artworks, next_cursor
+
+
+def _sign_artworks(artworks, expires):
+    paths = list(dict.fromkeys(p for a in artworks for p in (a.get('image_url'), a.get('thumbnail_path')) if p))
+    if not paths:
+        return
+    signed, _, _ = _sign_paths('artworks', paths, expires)
+    for a in artworks:
+        a['signed_url'] = (signed.get(a.get('image_url')) or {}).get('signedURL')
+        a['thumbnail_signed_url'] = (signed.get(a.get('thumbnail_path')) or {}).get('signedURL')
+
+
+@app.route('/me/dashboard')
+@token_required
+def dashboard():
+    """Everything the profile page shows, in one call.
+    Query params: ?limit=<n per list>&sections=<comma-separated subset of uploaded,liked,saved>
+                  &uploaded_cursor=&liked_cursor=&saved_cursor= (a list's next_cursor, to page it)
+    Returns JSON: { profile, uploaded: { artworks, next_cursor }, liked: {...}, saved: {...} }
+    Each artwork carries `artist`, `thumbnail_path`, `signed_url` and `thumbnail_signed_url`;
+    liked/saved artworks also carry `interacted_at`, and skip artworks since deleted or
+    made private, so their pages can be shorter than limit.
+    """
+    if not supabase:
+        return jsonify({'message': 'Database client not initialized'}), 500
+
+    user_id = g.user.get('sub')
+    raw_sections = request.args.get('sections')
+    sections = [s.strip() for s in raw_sections.split(',') if s.strip()] if raw_sections else list(DASHBOARD_SECTIONS)
+    unknown = [s for s in sections if s not in DASHBOARD_SECTIONS]
+    if unknown:
+        return jsonify({'message': f"Unknown sections: {', '.join(unknown)}"}), 400
+    try:
+        limit = int(request.args.get('limit') or DASHBOARD_DEFAULT_LIMIT)
+    except ValueError:
+        return jsonify({'message': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, DASHBOARD_MAX_LIMIT))
+
+    cursors = {}
+    for section in sections:
+        cursor = request.args.get(f'{section}_cursor')
+        try:
+            cursors[section] = _decode_cursor(cursor) if cursor else None
+        except Exception:
+            return jsonify({'message': f'Invalid {section}_cursor'}), 400
+
+    try:
+        profile_future = dashboard_pool.submit(get_cached_profile, user_id)
+        futures = {}
+        for section in sections:
+            if section == 'uploaded':
+                futures[section] = dashboard_pool.submit(_dashboard_uploaded, user_id, cursors[section], limit)
+            else:
+                table = 'likes' if section == 'liked' else 'saves'
+                futures[section] = dashboard_pool.submit(_dashboard_interactions, table, user_id, cursors[section], limit)
+
+        profile = profile_future.result()
+        if not profile:
             return jsonify({'message': 'Profile not found.'}), 404
-            
-        return jsonify(response.data), 200
+        pages = {section: f.result() for section, f in futures.items()}
+
+        if 'uploaded' in pages:
+            artist = {c: profile.get(c) for c in ARTIST_EMBED_COLUMNS}
+            for a in pages['uploaded'][0]:
+                a['artist'] = artist
+        artworks = [a for page, _ in pages.values() for a in page]
+        for a in artworks:
+            a['thumbnail_path'] = thumbnail_path(a)
+        _sign_artworks(artworks, DASHBOARD_SIGNED_URL_EXPIRES)
 
+        payload = {'profile': profile}
+        for section, (page, next_cursor) in pages.items():
+            payload[section] = {'artworks': page, 'next_cursor': next_cursor}
+        return json_response(Response, payload)
     except Exception as e:
-        print(f"Error fetching profile: {e}")
-        return jsonify({'message': 'Error fetching profile', 'error': str(e)}), 500
+        logs.error('dashboard.failed', user_id=user_id, error=str(e))
+        return jsonify({'message': 'Error loading dashboard', 'error': str(e)}), error_status(e)
+
+
+SEARCH_DEFAULT_LIMIT = 24
+SEARCH_MAX_LIMIT = 100
+SEARCH_READY_WAIT = float(os.getenv('SEARCH_READY_WAIT', '5'))
+
+
+@app.route('/search')
+@token_required
+def search():
+    """Search public artworks by title words and tags, served from the in-memory index.
+    Query params: ?q=<text>&tags=<comma-separated>&limit=<n>&offset=<n>
+    Every word of q must match a title word or tag, exactly or as a prefix; every
+    listed tag must match exactly.
+    Returns JSON: { results: [...], total: int, next_offset: int | null }
+    """
+    q = request.args.get('q') or ''
+    tags = _parse_tags(request.args.get('tags'))
+    if not q.strip() and not tags:
+        return jsonify({'message': 'q or tags query parameter required'}), 400
+    try:
+        limit = int(request.args.get('limit') or SEARCH_DEFAULT_LIMIT)
+        offset = int(request.args.get('offset') or 0)
+    except ValueError:
+        return jsonify({'message': 'limit and offset must be integers'}), 400
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    offset = max(0, offset)
+
+    if not search_index.ready.wait(SEARCH_READY_WAIT):
+        return jsonify({'message': 'Search index is still building'}), 503
+
+    total, results = search_index.search(q, tags, offset=offset, limit=limit)
+    next_offset = offset + len(results) if offset + len(results) < total else None
+    return json_response(Response, {'results': results, 'total': total, 'next_offset': next_offset})
+
+
+INTERACTION_KINDS = ('like', 'save')
+INTERACTIONS_MAX_BATCH = int(os.getenv('INTERACTIONS_MAX_BATCH', '200'))
+
+
+@app.route('/interactions/batch', methods=['POST'])
+@token_required
+def interactions_batch():
+    """Apply many like/save changes for the current user in one call.
+    Body: { ops: [{artwork_id, kind: "like" | "save", value: bool}, ...] }
+    Ops for the same artwork and kind collapse to the last one, so rapid
+    repeated clicks cost a single write.
+    Returns JSON: { artworks: [{artwork_id, like_count, save_count, liked, saved}],
+    skipped: [artwork_id, ...] } where skipped lists artworks that no longer exist.
+    """
+    if not supabase:
+        return jsonify({'message': 'Database client not initialized'}), 500
+
+    user_id = g.user.get('sub')
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({'message': 'Request body must be a JSON object'}), 400
+    ops = body.get('ops')
+    if not isinstance(ops, list) or not ops:
+        return jsonify({'message': 'ops must be a non-empty list'}), 400
+    if len(ops) > INTERACTIONS_MAX_BATCH:
+        return jsonify({'message': f'at most {INTERACTIONS_MAX_BATCH} ops per request'}), 400
+
+    final = {}
+    for op in ops:
+        if not isinstance(op, dict) or op.get('kind') not in INTERACTION_KINDS or not op.get('artwork_id') \
+                or not isinstance(op.get('value'), bool):
+            return jsonify({'message': 'each op needs artwork_id, kind (like|save) and a boolean value'}), 400
+        try:
+            # The RPC casts artwork_id to uuid; a bad one would fail the whole batch
+            artwork_id = str(uuid.UUID(str(op['artwork_id'])))
+        except ValueError:
+            return jsonify({'message': f"artwork_id is not a valid id: {op['artwork_id']}"}), 400
+        final[(artwork_id, op['kind'])] = op['value']
+
+    collapsed = [{'artwork_id': a, 'kind': k, 'value': v} for (a, k), v in final.items()]
+    try:
+        # Inserts/deletes and the counter read-back happen in one transaction.
+        # See migrations/add_like_save_counters.sql.
+        resp = db_upstream.call(
+            supabase.rpc('apply_interactions', {'p_user_id': user_id, 'p_ops': collapsed}).execute,
+            timeout=UPSTREAM_WRITE_TIMEOUT, op='apply_interactions',
+        )
+        artworks = getattr(resp, 'data', None) or []
+        applied = {a.get('artwork_id') for a in artworks if isinstance(a, dict)}
+        skipped = sorted({op['artwork_id'] for op in collapsed} - applied)
+        return jsonify({'artworks': artworks, 'skipped': skipped}), 200
+    except Exception as e:
+        logs.error('interactions.failed', user_id=user_id, ops=len(collapsed), error=str(e))
+        return jsonify({'message': 'Error applying interactions', 'error': str(e)}), error_status(e)
 
 
 def _parse_resp_single(resp):
@@ -287,8 +1670,10 @@ def _parse_resp_single(resp):
 def artist_resolver():
     """Resolve a handle or id to a public profile and artworks using the service role.
     Public endpoint (no token) but uses service role on server to bypass RLS safely.
-    Query param: ?handle=<handle-or-id>
-    Returns JSON: { profile: {...} | null, artworks: [...] }
+    Query params: ?handle=<handle-or-id>[&fields=id,title,image_url,...]
+    Returns JSON: { profile: {...} | null, artworks: [...] }; artworks carry
+    serialization.ARTWORK_COLUMNS plus thumbnail_path unless `fields` narrows them.
+    Sends a strong ETag and public Cache-Control; a matching If-None-Match gets a 304.
     """
     if not supabase:
         return jsonify({'message': 'Database client not initialized'}), 500
@@ -298,90 +1683,34 @@ def artist_resolver():
         return jsonify({'message': 'handle query parameter required'}), 400
 
     try:
-        print(f"[artist_resolver] incoming handle={handle}", flush=True)
-        profile = None
+        fields = parse_fields(request.args.get('fields'), ARTWORK_COLUMNS + ARTWORK_EXTRA_FIELDS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
 
-        # local helper to serialize rows to JSON-safe dicts
-        def _serialize_row(row):
-            if not isinstance(row, dict):
-                return row
-            out = {}
-            for k, v in row.items():
-                try:
-                    # datetimes -> isoformat
-                    if hasattr(v, 'isoformat'):
-                        out[k] = v.isoformat()
-                    else:
-                        out[k] = v
-                except Exception:
-                    out[k] = str(v)
-            return out
-
-        # 1) try by handle
-        resp = supabase.table('profiles').select('*').eq('handle', handle).limit(1).execute()
-        profile = _parse_resp_single(resp)
-        print(f"[artist_resolver] by handle -> {bool(profile)}", flush=True)
-
-        # 2) try by id if input looks like uuid
-        import re
-        if not profile and re.match(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', handle, re.I):
-            resp = supabase.table('profiles').select('*').eq('id', handle).limit(1).execute()
-            profile = _parse_resp_single(resp)
-            print(f"[artist_resolver] by id -> {bool(profile)}", flush=True)
-
-        # 3) try by username
-        if not profile:
-            resp = supabase.table('profiles').select('*').eq('username', handle).limit(1).execute()
-            profile = _parse_resp_single(resp)
-            print(f"[artist_resolver] by username -> {bool(profile)}", flush=True)
+    try:
+        logs.hot_debug('artist_resolver.start', handle=handle)
 
-        # 4) resolve via artworks_with_username view
-        if not profile:
-            resp = supabase.table('artworks_with_username').select('user_id').eq('handle', handle).limit(1).execute()
-            row = _parse_resp_single(resp)
-            if not row:
-                resp = supabase.table('artworks_with_username').select('user_id').eq('username', handle).limit(1).execute()
-                row = _parse_resp_single(resp)
-            print(f"[artist_resolver] artworks view resolved -> {bool(row)}", flush=True)
-            if row and row.get('user_id'):
-                resp = supabase.table('profiles').select('*').eq('id', row.get('user_id')).limit(1).execute()
-                profile = _parse_resp_single(resp)
-
-        # Fetch artworks for the user (if profile found), else attempt to fetch artworks matching the handle
-        artworks = []
-        if profile and profile.get('id'):
-            resp = supabase.table('artworks').select('*').eq('user_id', profile.get('id')).execute()
-            data = getattr(resp, 'data', None)
-            if isinstance(data, list):
-                try:
-                    artworks = sorted(data, key=lambda r: r.get('created_at') or '', reverse=True)
-                except Exception:
-                    artworks = data
-        else:
-            resp = supabase.table('artworks_with_username').select('*').eq('handle', handle).execute()
-            data = getattr(resp, 'data', None)
-            if isinstance(data, list) and len(data) > 0:
-                try:
-                    artworks = sorted(data, key=lambda r: r.get('created_at') or '', reverse=True)
-                except Exception:
-                    artworks = data
-            else:
-                resp = supabase.table('artworks_with_username').select('*').eq('username', handle).execute()
-                data = getattr(resp, 'data', None)
-                if isinstance(data, list) and len(data) > 0:
-                    try:
-                        artworks = sorted(data, key=lambda r: r.get('created_at') or '', reverse=True)
-                    except Exception:
-                        artworks = data
-
-        # Serialize to JSON-safe structures
-        prof_out = _serialize_row(profile) if profile else None
-        arts_out = [_serialize_row(a) for a in artworks]
-        print(f"[artist_resolver] returning profile={bool(prof_out)} artworks={len(arts_out)}", flush=True)
-        return jsonify({'profile': prof_out, 'artworks': arts_out}), 200
+        # Profile lookup (handle, id or username) and its artworks, newest first,
+        # in one round trip. See migrations/project_resolve_artist_columns.sql.
+        def load():
+            resp = db_upstream.call(
+                supabase.rpc('resolve_artist', resolve_artist_args(handle)).execute,
+                idempotent=True, hedge=True, op='resolve_artist',
+            )
+            return artist_page(getattr(resp, 'data', None))
+
+        resolved = profile_cache.get_or_load(('artist', handle), load)
+        etag = resolved['etag'] if fields is None else _make_etag(resolved['etag'], fields)
+        headers = conditional_headers(etag, RESOLVER_CACHE_CONTROL)
+        if request.if_none_match.contains_weak(etag):
+            return '', 304, headers
+
+        artworks = project(resolved['artworks'], fields)
+        logs.hot_debug('artist_resolver.done', handle=handle, profile=bool(resolved['profile']), artworks=len(artworks))
+        return json_response(Response, {'profile': resolved['profile'], 'artworks': artworks}, 200, headers)
     except Exception as e:
-        print(f"artist_resolver error: {e}", flush=True)
-        return jsonify({'message': 'Error resolving artist', 'error': str(e)}), 500
+        logs.error('artist_resolver.failed', handle=handle, error=str(e))
+        return jsonify({'message': 'Error resolving artist', 'error': str(e)}), error_status(e)
 
 
 if __name__ == '__main__':
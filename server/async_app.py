@@ -0,0 +1,440 @@
+# asyncio serving mode.
+#
+# The I/O-bound endpoints (/upload, /upload-avatar, /signed-url, /profile and
+# /artist-resolver) are served by a Quart app whose upstream calls go through
+# async HTTP clients, so one process can keep hundreds of requests in flight
+# instead of one per worker thread. Every other route falls through to the
+# Flask app in app.py, run in a thread pool.
+#
+#   hypercorn async_app:asgi --bind 0.0.0.0:5001
+#   python async_app.py
+
+import asyncio
+import os
+import time
+from functools import wraps
+
+import jwt
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from quart import Quart, Request, Response, request, jsonify, g
+from quart_cors import cors
+from supabase import acreate_client
+from supabase.lib.client_options import AsyncClientOptions
+import httpx
+
+import app as wsgi
+from app import (
+    SUPABASE_URL, SUPABASE_SERVICE_KEY, UPLOAD_MAX_BYTES,
+    UploadStream, UploadTooLarge, _file_size, hashing_stream_factory, content_digest, content_addressed_path, _verify_token, _parse_resp_single, _artwork_payload,
+    _cached_signed_urls, _remember_signed_urls, _expiry_bucket, SIGNED_URL_EXPIRY_STEP,
+    profile_cache, invalidate_artist_pages, derivative_pipeline, index_artworks,
+    profile_etag, conditional_headers, _make_etag, resolve_artist_args, artist_page,
+    PROFILE_CACHE_CONTROL, RESOLVER_CACHE_CONTROL, db_upstream, storage_upstream,
+    is_creator, CREATOR_ONLY_MESSAGE,
+)
+import logs
+import metrics
+from serialization import ARTWORK_COLUMNS, ARTWORK_EXTRA_FIELDS, parse_fields, project, json_response
+from storage_gateway import AsyncStorageGateway
+from upstream import UpstreamError, error_status, UPSTREAM_WRITE_TIMEOUT, UPSTREAM_TRANSFER_TIMEOUT
+
+app = Quart(__name__)
+app = cors(app, allow_origin='*')
+app.config['MAX_CONTENT_LENGTH'] = wsgi.app.config['MAX_CONTENT_LENGTH']
+
+
+class UploadRequest(Request):
+    # Hash uploaded files while the multipart body is parsed, as app.UploadRequest does
+    def make_form_data_parser(self):
+        parser = super().make_form_data_parser()
+        parser.stream_factory = hashing_stream_factory
+        return parser
+
+
+app.request_class = UploadRequest
+
+ASYNC_PATHS = {'/upload', '/upload-avatar', '/signed-url', '/profile', '/artist-resolver'}
+
+supabase = None
+storage_gateway = AsyncStorageGateway(SUPABASE_URL, SUPABASE_SERVICE_KEY, event_hooks=metrics.async_httpx_event_hooks())
+
+
+@app.before_serving
+async def init_clients():
+    global supabase
+    supabase = await acreate_client(SUPABASE_URL, SUPABASE_SERVICE_KEY, options=AsyncClientOptions(
+        httpx_client=httpx.AsyncClient(http2=True, follow_redirects=True, timeout=120, event_hooks=metrics.async_httpx_event_hooks()),
+    ))
+    logs.info('client.initialized', client='supabase-async', pid=os.getpid())
+    # Clients and background jobs of the Flask app that serves the remaining routes
+    wsgi.init_worker()
+
+
+@app.after_serving
+async def close_clients():
+    await storage_gateway.aclose()
+
+
+@app.before_request
+async def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+async def _record_latency(response):
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.http_request_duration.observe(
+            time.perf_counter() - started,
+            endpoint=endpoint, method=request.method, status=response.status_code,
+        )
+    return response
+
+
+def token_required(f):
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+        token = None
+        if 'Authorization' in request.headers:
+            parts = request.headers['Authorization'].split()
+            if len(parts) == 2 and parts[0].lower() == 'bearer':
+                token = parts[1]
+
+        if not token:
+            return jsonify({'message': 'Token is missing!'}), 401
+
+        try:
+            g.user = _verify_token(token)
+            g.token = token
+        except jwt.ExpiredSignatureError:
+            return jsonify({'message': 'Token has expired!'}), 401
+        except jwt.InvalidTokenError as e:
+            return jsonify({'message': 'Token is invalid!', 'error': str(e)}), 401
+
+        return await f(*args, **kwargs)
+    return decorated
+
+
+async def get_cached_profile(user_id):
+    async def load():
+        resp = await db_upstream.acall(
+            supabase.table('profiles').select('*').eq('id', user_id).limit(1).execute,
+            idempotent=True, op='profile',
+        )
+        return _parse_resp_single(resp)
+    return await profile_cache.aget_or_load(('id', user_id), load)
+
+
+async def find_stored_blob(user_id, digest):
+    # Async counterpart of app.find_stored_blob
+    query = (
+        supabase.table('artworks')
+        .select('image_url,derivatives')
+        .eq('user_id', user_id)
+        .eq('content_sha256', digest)
+        .limit(1)
+    )
+    return _parse_resp_single(await db_upstream.acall(query.execute, idempotent=True, op='find_blob'))
+
+
+async def _stream_upload(method, bucket, object_path, file, log_prefix, token=None):
+    """Async counterpart of app._stream_upload."""
+    size = _file_size(file.stream)
+    if size is not None and size > UPLOAD_MAX_BYTES:
+        raise UploadTooLarge(f'upload exceeds {UPLOAD_MAX_BYTES} bytes')
+
+    body = UploadStream(file.stream)
+
+    async def chunks():
+        # The spooled upload may be on disk; read it off the event loop so one
+        # large upload does not stall every other request
+        it = iter(body)
+        while True:
+            chunk = await asyncio.to_thread(next, it, None)
+            if chunk is None:
+                break
+            yield chunk
+
+    started = time.perf_counter()
+    resp = await storage_upstream.acall(
+        lambda: storage_gateway.upload(method, bucket, object_path, chunks(), content_type=file.content_type, token=token, size=size),
+        timeout=UPSTREAM_TRANSFER_TIMEOUT, op='upload',
+    )
+    elapsed = time.perf_counter() - started
+    mb_per_s = (body.bytes_read / (1024 * 1024)) / elapsed if elapsed > 0 else 0.0
+    logs.hot_info('upload.streamed', prefix=log_prefix, bucket=bucket, bytes=body.bytes_read,
+              seconds=round(elapsed, 4), mb_per_s=round(mb_per_s, 2), status=resp.status_code)
+    return resp
+
+
+async def _store_blob(user_id, digest, file, log_prefix, token):
+    """Async counterpart of app._store_blob."""
+    try:
+        existing = await find_stored_blob(user_id, digest)
+    except Exception as e:
+        logs.warning('upload.dedup_lookup_failed', user_id=user_id, error=str(e))
+        existing = None
+    if existing and existing.get('image_url'):
+        logs.info('upload.deduplicated', user_id=user_id, object_path=existing['image_url'])
+        return existing['image_url'], existing, None
+    object_path = content_addressed_path(user_id, digest, file.filename)
+    logs.hot_debug('upload.start', user_id=user_id, object_path=object_path)
+    return object_path, None, await _stream_upload('PUT', 'artworks', object_path, file, log_prefix, token=token)
+
+
+async def _discard_blob(user_id, digest, object_path):
+    """Async counterpart of app._discard_blob."""
+    try:
+        if await find_stored_blob(user_id, digest) is None:
+            await storage_upstream.acall(lambda: storage_gateway.delete('artworks', object_path),
+                                         timeout=UPSTREAM_WRITE_TIMEOUT, op='delete')
+            logs.info('upload.blob_discarded', user_id=user_id, object_path=object_path)
+    except Exception as e:
+        logs.warning('upload.blob_discard_failed', object_path=object_path, error=str(e))
+
+
+@app.errorhandler(UpstreamError)
+async def upstream_error(e):
+    return jsonify({'message': 'Upstream service unavailable', 'error': str(e)}), e.status
+
+
+@app.after_request
+async def _retry_after(response):
+    if response.status_code == 503 and 'Retry-After' not in response.headers:
+        response.headers['Retry-After'] = '1'
+    return response
+
+
+@app.errorhandler(413)
+async def request_too_large(e):
+    return jsonify({'message': f'File too large (max {UPLOAD_MAX_BYTES} bytes)'}), 413
+
+
+@app.route('/upload', methods=['POST'])
+@token_required
+async def upload_artwork():
+    user_id = g.user.get('sub')
+    token = g.token
+
+    # The role check runs while the request body is still arriving from the client
+    role_check = asyncio.ensure_future(get_cached_profile(user_id))
+    try:
+        files = await request.files
+        form = await request.form
+    except BaseException:
+        role_check.cancel()
+        raise
+
+    try:
+        profile_data = await role_check
+    except Exception as e:
+        logs.error('upload.role_check_failed', endpoint='upload_artwork', user_id=user_id, error=str(e))
+        return jsonify({'message': 'Error verifying user role', 'error': str(e)}), error_status(e)
+    if not is_creator(profile_data):
+        logs.info('upload.forbidden', endpoint='upload_artwork', user_id=user_id,
+                  user_type=profile_data.get('user_type') if isinstance(profile_data, dict) else None)
+        return jsonify({'message': CREATOR_ONLY_MESSAGE}), 403
+
+    if 'file' not in files:
+        return jsonify({'message': 'No file part in request'}), 400
+
+    file = files['file']
+    filename = file.filename
+    if not filename:
+        return jsonify({'message': 'File must have a filename'}), 400
+
+    # Normally the hash is taken while the body is parsed; the fallback reads the
+    # whole file, so keep it off the event loop
+    digest = await asyncio.to_thread(content_digest, file)
+    try:
+        object_path, existing, resp = await _store_blob(user_id, digest, file, '[upload]', token)
+        if resp is not None and not resp.is_success:
+            return jsonify({'message': 'Failed to upload to storage', 'status_code': resp.status_code, 'body': resp.text}), 500
+    except UploadTooLarge as e:
+        return jsonify({'message': 'File too large', 'error': str(e)}), 413
+    except Exception as e:
+        logs.error('upload.storage_failed', user_id=user_id, error=str(e))
+        return jsonify({'message': 'Error uploading to storage', 'error': str(e)}), error_status(e)
+
+    try:
+        insert_payload = _artwork_payload(user_id, object_path, form, digest=digest)
+        if existing and existing.get('derivatives'):
+            insert_payload['derivatives'] = existing['derivatives']
+        insert_resp = await db_upstream.acall(supabase.table('artworks').insert(insert_payload).execute,
+                                              timeout=UPSTREAM_WRITE_TIMEOUT, op='insert_artwork')
+        data = getattr(insert_resp, 'data', None)
+        err = getattr(insert_resp, 'error', None) or (insert_resp[1] if isinstance(insert_resp, (list, tuple)) and len(insert_resp) > 1 else None)
+        if err:
+            logs.error('upload.insert_failed', object_path=object_path, error=str(err))
+            if resp is not None:
+                await _discard_blob(user_id, digest, object_path)
+            return jsonify({'message': 'Failed to insert artwork record', 'error': str(err)}), 500
+
+        invalidate_artist_pages(profile_data)
+        index_artworks(data, profile_data)
+        row = _parse_resp_single(insert_resp)
+        if isinstance(row, dict) and row.get('id') and not insert_payload.get('derivatives'):
+            try:
+                # Copies the upload to a temp file, which may be tens of MB
+                await asyncio.to_thread(derivative_pipeline.submit, file.stream,
+                                        {'artwork_id': row['id'], 'image_url': object_path, 'profile': profile_data})
+            except Exception as e:
+                logs.warning('upload.derivatives_not_queued', object_path=object_path, error=str(e))
+
+        return jsonify({'message': 'Uploaded', 'row': data, 'deduplicated': existing is not None}), 201
+    except Exception as e:
+        logs.error('upload.insert_failed', object_path=object_path, error=str(e))
+        if resp is not None:
+            await _discard_blob(user_id, digest, object_path)
+        return jsonify({'message': 'Error inserting artwork', 'error': str(e)}), error_status(e)
+
+
+@app.route('/upload-avatar', methods=['POST'])
+@token_required
+async def upload_avatar():
+    user_id = g.user.get('sub')
+    files = await request.files
+
+    if 'file' not in files:
+        return jsonify({'message': 'No file part in request'}), 400
+
+    file = files['file']
+    filename = file.filename
+    if not filename:
+        return jsonify({'message': 'File must have a filename'}), 400
+
+    file_ext = filename.split('.')[-1] if '.' in filename else 'jpg'
+    object_path = f"{user_id}/{int(time.time() * 1000)}.{file_ext}"
+
+    try:
+        resp = await _stream_upload('POST', 'avatars', object_path, file, '[upload-avatar]')
+        if not resp.is_success:
+            return jsonify({'message': 'Failed to upload to storage', 'status_code': resp.status_code, 'body': resp.text}), 500
+    except UploadTooLarge as e:
+        return jsonify({'message': 'File too large', 'error': str(e)}), 413
+    except Exception as e:
+        logs.error('upload_avatar.storage_failed', object_path=object_path, error=str(e))
+        return jsonify({'message': 'Error uploading to storage', 'error': str(e)}), error_status(e)
+
+    public_url = f"{SUPABASE_URL}/storage/v1/object/public/avatars/{object_path}"
+
+    try:
+        update_resp = await db_upstream.acall(
+            supabase.table('profiles').update({'avatar_url': public_url}).eq('id', user_id).execute,
+            timeout=UPSTREAM_WRITE_TIMEOUT, op='update_avatar',
+        )
+        updated = _parse_resp_single(update_resp)
+        invalidate_artist_pages(profile_cache.get(('id', user_id)))
+        if isinstance(updated, dict):
+            profile_cache.set(('id', user_id), updated)
+            invalidate_artist_pages(updated)
+        else:
+            profile_cache.delete(('id', user_id))
+
+        return jsonify({'message': 'Avatar uploaded successfully', 'avatar_url': public_url}), 200
+    except Exception as e:
+        logs.error('upload_avatar.profile_update_failed', user_id=user_id, error=str(e))
+        return jsonify({'message': 'Avatar uploaded but failed to update profile', 'error': str(e), 'avatar_url': public_url}), error_status(e)
+
+
+@app.route('/signed-url')
+@token_required
+async def signed_url():
+    path = request.args.get('path')
+    bucket = request.args.get('bucket') or 'artworks'
+    try:
+        expires = int(request.args.get('expires') or 60)
+    except ValueError:
+        return jsonify({'message': 'expires must be an integer'}), 400
+
+    if not path:
+        return jsonify({'message': 'path query parameter required'}), 400
+
+    try:
+        results, to_sign = _cached_signed_urls(bucket, [path], expires)
+        if to_sign:
+            signed = await storage_upstream.acall(
+                lambda: storage_gateway.create_signed_urls(bucket, to_sign, _expiry_bucket(expires) + SIGNED_URL_EXPIRY_STEP),
+                idempotent=True, hedge=True, op='sign',
+            )
+            _remember_signed_urls(bucket, expires, to_sign, signed, results)
+        res = results[path]
+        if res.get('error') or not res.get('signedURL'):
+            return jsonify({'message': 'Failed to create signed url', 'error': str(res.get('error'))}), 500
+        return jsonify({'signedURL': res['signedURL'], 'signedUrl': res['signedURL']}), 200
+    except Exception as e:
+        return jsonify({'message': 'Failed to create signed url', 'error': str(e)}), error_status(e)
+
+
+@app.route('/profile', methods=['GET'])
+@token_required
+async def get_profile():
+    user_id = g.user.get('sub')
+
+    try:
+        profile = await get_cached_profile(user_id)
+        if not profile:
+            return jsonify({'message': 'Profile not found.'}), 404
+        etag = profile_etag(profile)
+        headers = conditional_headers(etag, PROFILE_CACHE_CONTROL)
+        if request.if_none_match.contains_weak(etag):
+            return '', 304, headers
+        return jsonify(profile), 200, headers
+    except Exception as e:
+        logs.error('profile.fetch_failed', user_id=user_id, error=str(e))
+        return jsonify({'message': 'Error fetching profile', 'error': str(e)}), error_status(e)
+
+
+@app.route('/artist-resolver')
+async def artist_resolver():
+    handle = request.args.get('handle')
+    if not handle:
+        return jsonify({'message': 'handle query parameter required'}), 400
+
+    try:
+        fields = parse_fields(request.args.get('fields'), ARTWORK_COLUMNS + ARTWORK_EXTRA_FIELDS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    try:
+        async def load():
+            resp = await db_upstream.acall(
+                supabase.rpc('resolve_artist', resolve_artist_args(handle)).execute,
+                idempotent=True, hedge=True, op='resolve_artist',
+            )
+            return artist_page(getattr(resp, 'data', None))
+
+        resolved = await profile_cache.aget_or_load(('artist', handle), load)
+        etag = resolved['etag'] if fields is None else _make_etag(resolved['etag'], fields)
+        headers = conditional_headers(etag, RESOLVER_CACHE_CONTROL)
+        if request.if_none_match.contains_weak(etag):
+            return '', 304, headers
+
+        artworks = project(resolved['artworks'], fields)
+        return json_response(Response, {'profile': resolved['profile'], 'artworks': artworks}, 200, headers)
+    except Exception as e:
+        logs.error('artist_resolver.failed', handle=handle, error=str(e))
+        return jsonify({'message': 'Error resolving artist', 'error': str(e)}), error_status(e)
+
+
+# Remaining routes are served by the Flask app in a thread pool. The WSGI middleware
+# buffers request bodies, so they are capped at the single-upload limit here;
+# large /upload/batch requests should go to the Flask server directly.
+wsgi_fallback = AsyncioWSGIMiddleware(wsgi.app, max_body_size=wsgi.app.config['MAX_CONTENT_LENGTH'])
+
+
+async def asgi(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] not in ASYNC_PATHS:
+        await wsgi_fallback(scope, receive, send)
+    else:
+        await app(scope, receive, send)
+
+
+if __name__ == '__main__':
+    import hypercorn.asyncio
+    from hypercorn.config import Config
+
+    config = Config()
+    config.bind = [f"0.0.0.0:{os.getenv('PORT', '5001')}"]
+    asyncio.run(hypercorn.asyncio.serve(asgi, config))
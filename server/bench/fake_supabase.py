@@ -0,0 +1,397 @@
+"""In-process stand-in for the Supabase PostgREST and Storage HTTP APIs.
+
+Implements only what the server uses: table selects with eq/in filters, order,
+limit and embedded to-one resources; inserts and updates; the resolve_artist,
+apply_interactions and trending_artworks RPCs; object uploads, downloads and
+batch URL signing. Every request sleeps for a configurable injected latency so
+benchmarks can model a remote project.
+
+    python bench/fake_supabase.py --port 54321 --latency-ms 20
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+
+def seed_data(profiles=50, artworks_per_profile=20, likes=2000, saves=1000, seed=1):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    db = {'profiles': [], 'artworks': [], 'likes': [], 'saves': []}
+    for i in range(profiles):
+        db['profiles'].append({
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'username': f'user{i}',
+            'handle': f'artist{i}',
+            'user_type': 'creator',
+            'bio': 'Seeded profile',
+            'avatar_url': None,
+        })
+    for p in db['profiles']:
+        for j in range(artworks_per_profile):
+            db['artworks'].append({
+                'id': str(uuid.UUID(int=rng.getrandbits(128))),
+                'user_id': p['id'],
+                'title': f'Piece {j}',
+                'description': '',
+                'image_url': f"{p['id']}/piece-{j}.png",
+                'tags': rng.sample(['ink', 'oil', 'digital', 'sketch', 'portrait', 'landscape'], 2),
+                'is_public': True,
+                'like_count': 0,
+                'save_count': 0,
+                'created_at': (now - timedelta(minutes=rng.randrange(500000))).isoformat(),
+            })
+    for table, n, counter in (('likes', likes, 'like_count'), ('saves', saves, 'save_count')):
+        seen = set()
+        for _ in range(n):
+            user = rng.choice(db['profiles'])['id']
+            art = rng.choice(db['artworks'])
+            if (user, art['id']) in seen:
+                continue
+            seen.add((user, art['id']))
+            art[counter] += 1
+            db[table].append({
+                'id': str(uuid.uuid4()), 'user_id': user, 'artwork_id': art['id'],
+                'created_at': (now - timedelta(minutes=rng.randrange(100000))).isoformat(),
+            })
+    return db
+
+
+class FakeSupabase:
+    def __init__(self, db=None, latency_ms=0.0, jitter_ms=0.0, object_bytes=64 * 1024):
+        self.db = db if db is not None else seed_data()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        # Sizes of stored objects; seeded artworks exist with object_bytes each
+        self.objects = {('artworks', a['image_url']): object_bytes for a in self.db['artworks']}
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def views(self):
+        by_id = {p['id']: p for p in self.db['profiles']}
+        rows = []
+        for a in self.db['artworks']:
+            p = by_id.get(a['user_id'], {})
+            rows.append(dict(a, username=p.get('username'), handle=p.get('handle'), avatar_url=p.get('avatar_url')))
+        return rows
+
+    def rows(self, table):
+        if table == 'artworks_with_username':
+            return self.views()
+        return self.db.setdefault(table, [])
+
+    def sleep(self):
+        delay = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+
+def _match(row, col, expr):
+    op, _, value = expr.partition('.')
+    current = row.get(col)
+    if op == 'eq':
+        value = value.strip('"')
+        if isinstance(current, bool):
+            return current == (value.lower() == 'true')
+        return str(current) == value
+    if op == 'neq':
+        return str(current) != value
+    if op == 'in':
+        items = [v.strip().strip('"') for v in value.strip('()').split(',')]
+        return str(current) in items
+    if op in ('gt', 'gte', 'lt', 'lte'):
+        value = value.strip('"')
+        if current is None:
+            return False
+        current = str(current)
+        return {'gt': current > value, 'gte': current >= value, 'lt': current < value, 'lte': current <= value}[op]
+    if op == 'is':
+        return current is None if value == 'null' else True
+    # Other operators (or-trees, ...) are not needed by the benchmarks
+    return True
+
+
+# Embedded to-one resources (select=...,artworks(...)) and the foreign key column
+# PostgREST would follow for each
+_EMBEDS = {('likes', 'artworks'): 'artwork_id', ('saves', 'artworks'): 'artwork_id', ('artworks', 'profiles'): 'user_id'}
+
+
+def _split_columns(value):
+    # Split a select list on top-level commas only
+    parts, depth, current = [], 0, ''
+    for ch in value:
+        if ch == ',' and depth == 0:
+            parts.append(current.strip())
+            current = ''
+            continue
+        depth += (ch == '(') - (ch == ')')
+        current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _embed(fake, table, rows, columns):
+    plain = [c for c in columns if '(' not in c]
+    nested = [(c[:c.index('(')], _split_columns(c[c.index('(') + 1:-1])) for c in columns if '(' in c]
+    by_id = {name: {x['id']: x for x in fake.rows(name)} for name, _ in nested}
+    out = []
+    for r in rows:
+        row = dict(r) if '*' in plain else {c: r[c] for c in plain if c in r}
+        for name, sub in nested:
+            related = by_id[name].get(r.get(_EMBEDS[(table, name)]))
+            row[name] = _embed(fake, name, [related], sub)[0] if related else None
+        out.append(row)
+    return out
+
+
+def _select(rows, params, fake=None, table=None):
+    order = None
+    limit = None
+    columns = None
+    filters = []
+    for key, value in params:
+        if key == 'select':
+            columns = None if value.strip() in ('', '*') else _split_columns(value)
+        elif key == 'or':
+            continue
+        elif key == 'order':
+            order = value
+        elif key == 'limit':
+            limit = int(value)
+        elif key == 'offset':
+            continue
+        else:
+            filters.append((key, value))
+    out = [r for r in rows if all(_match(r, c, e) for c, e in filters)]
+    if order:
+        for part in reversed(order.split(',')):
+            col, _, direction = part.partition('.')
+            out.sort(key=lambda r: (r.get(col) is None, str(r.get(col) or '')), reverse=direction.startswith('desc'))
+    if limit is not None:
+        out = out[:limit]
+    if columns is not None and fake is not None and any('(' in c for c in columns):
+        return _embed(fake, table, out, columns)
+    return _pick(out, columns)
+
+
+def _pick(rows, columns):
+    if columns is None:
+        return rows
+    return [{c: r[c] for c in columns if c in r} for r in rows]
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _body(self):
+            length = self.headers.get('Content-Length')
+            if length is not None:
+                return self.rfile.read(int(length))
+            if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+                chunks = []
+                while True:
+                    size = int(self.rfile.readline().strip(), 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        break
+                    chunks.append(self.rfile.read(size))
+                    self.rfile.readline()
+                return b''.join(chunks)
+            return b''
+
+        def _send_bytes(self, data, content_type):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.wfile.write(data)
+
+        def _send(self, status, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _dispatch(self):
+            fake.sleep()
+            with fake.lock:
+                fake.requests += 1
+            url = urlsplit(self.path)
+            parts = [unquote(p) for p in url.path.split('/') if p]
+            params = parse_qsl(url.query, keep_blank_values=True)
+            body = self._body()
+
+            if parts[:2] == ['rest', 'v1'] and len(parts) >= 3:
+                if parts[2] == 'rpc':
+                    return self._rpc(parts[3], json.loads(body or b'{}'))
+                return self._rest(parts[2], params, body)
+            if parts[:3] == ['storage', 'v1', 'object'] and len(parts) >= 4:
+                return self._storage(parts[3:], body)
+            if parts == ['health']:
+                return self._send(200, {'ok': True})
+            return self._send(404, {'message': 'not found'})
+
+        def _rest(self, table, params, body):
+            with fake.lock:
+                rows = fake.rows(table)
+                if self.command in ('GET', 'HEAD'):
+                    return self._send(200, _select(rows, params, fake, table))
+                if self.command == 'POST':
+                    payload = json.loads(body or b'[]')
+                    payload = payload if isinstance(payload, list) else [payload]
+                    created = []
+                    for item in payload:
+                        row = dict(item)
+                        row.setdefault('id', str(uuid.uuid4()))
+                        row.setdefault('created_at', datetime.now(timezone.utc).isoformat())
+                        rows.append(row)
+                        created.append(row)
+                    return self._send(201, created)
+                if self.command == 'PATCH':
+                    changes = json.loads(body or b'{}')
+                    matched = _select(rows, [(k, v) for k, v in params if k != 'select'])
+                    for row in matched:
+                        row.update(changes)
+                    return self._send(200, matched)
+                if self.command == 'DELETE':
+                    matched = _select(rows, [(k, v) for k, v in params if k != 'select'])
+                    ids = {id(r) for r in matched}
+                    rows[:] = [r for r in rows if id(r) not in ids]
+                    return self._send(200, matched)
+            return self._send(405, {'message': 'method not allowed'})
+
+        def _rpc(self, fn, args):
+            with fake.lock:
+                if fn == 'resolve_artist':
+                    handle = args.get('p_handle')
+                    profiles = fake.db['profiles']
+                    profile = next((p for p in profiles if p.get('handle') == handle), None) \
+                        or next((p for p in profiles if p.get('id') == handle), None) \
+                        or next((p for p in profiles if p.get('username') == handle), None)
+                    artworks = []
+                    if profile:
+                        artworks = sorted((a for a in fake.db['artworks'] if a['user_id'] == profile['id']),
+                                          key=lambda a: a['created_at'], reverse=True)
+                    if profile:
+                        profile = _pick([profile], args.get('p_profile_columns'))[0]
+                    artworks = _pick(artworks, args.get('p_artwork_columns'))
+                    return self._send(200, {'profile': profile, 'artworks': artworks})
+                if fn == 'apply_interactions':
+                    user_id = args.get('p_user_id')
+                    artwork_ids = {a['id'] for a in fake.db['artworks']}
+                    touched = []
+                    for op in args.get('p_ops') or []:
+                        if op['artwork_id'] not in artwork_ids:
+                            continue
+                        table = 'likes' if op['kind'] == 'like' else 'saves'
+                        rows = fake.db[table]
+                        exists = any(r['user_id'] == user_id and r['artwork_id'] == op['artwork_id'] for r in rows)
+                        if op['value'] and not exists:
+                            rows.append({'id': str(uuid.uuid4()), 'user_id': user_id, 'artwork_id': op['artwork_id'],
+                                         'created_at': datetime.now(timezone.utc).isoformat()})
+                        elif not op['value'] and exists:
+                            rows[:] = [r for r in rows if not (r['user_id'] == user_id and r['artwork_id'] == op['artwork_id'])]
+                        touched.append(op['artwork_id'])
+                    out = []
+                    for art_id in dict.fromkeys(touched):
+                        out.append({
+                            'artwork_id': art_id,
+                            'like_count': sum(1 for r in fake.db['likes'] if r['artwork_id'] == art_id),
+                            'save_count': sum(1 for r in fake.db['saves'] if r['artwork_id'] == art_id),
+                            'liked': any(r['user_id'] == user_id and r['artwork_id'] == art_id for r in fake.db['likes']),
+                            'saved': any(r['user_id'] == user_id and r['artwork_id'] == art_id for r in fake.db['saves']),
+                        })
+                    return self._send(200, out)
+                if fn == 'trending_artworks':
+                    now = datetime.now(timezone.utc)
+                    since = datetime.fromisoformat(args['p_since'])
+                    half_life = float(args['p_half_life_seconds'])
+                    scores = {}
+                    for table, weight in (('likes', args.get('p_like_weight', 1)), ('saves', args.get('p_save_weight', 2))):
+                        for r in fake.db[table]:
+                            created = datetime.fromisoformat(r['created_at'])
+                            if created >= since:
+                                age = (now - created).total_seconds()
+                                scores[r['artwork_id']] = scores.get(r['artwork_id'], 0.0) + weight * 0.5 ** (age / half_life)
+                    rows = [a for a in fake.views() if a['id'] in scores and a.get('is_public', True)]
+                    rows.sort(key=lambda a: (scores[a['id']], a['created_at'], a['id']), reverse=True)
+                    rows = _pick(rows[:args.get('p_limit', 1000)], args.get('p_columns'))
+                    return self._send(200, [dict(r, score=scores[r['id']]) for r in rows])
+            return self._send(404, {'message': f'unknown function {fn}'})
+
+        def _storage(self, parts, body):
+            if parts[0] == 'sign' and self.command == 'POST':
+                bucket = parts[1]
+                args = json.loads(body or b'{}')
+                paths = args.get('paths') or ['/'.join(parts[2:])]
+                signed = [{'path': p, 'signedURL': f'/object/sign/{bucket}/{p}?token=fake', 'error': None} for p in paths]
+                return self._send(200, signed)
+            bucket, path = parts[0], '/'.join(parts[1:])
+            if self.command in ('PUT', 'POST'):
+                with fake.lock:
+                    fake.objects[(bucket, path)] = len(body)
+                return self._send(200, {'Key': f'{bucket}/{path}'})
+            if self.command == 'DELETE':
+                with fake.lock:
+                    fake.objects.pop((bucket, path), None)
+                return self._send(200, {'message': 'Successfully deleted'})
+            if self.command in ('GET', 'HEAD'):
+                size = fake.objects.get((bucket, path))
+                if size is None:
+                    return self._send(400, {'statusCode': '404', 'error': 'not_found', 'message': 'Object not found'})
+                # Deterministic filler of the stored size; only the byte count matters here
+                block = hashlib.sha256(f'{bucket}/{path}'.encode()).digest()
+                return self._send_bytes((block * (size // len(block) + 1))[:size], 'image/png')
+            return self._send(405, {'message': 'method not allowed'})
+
+        do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+    return Handler
+
+
+def serve(fake, host='127.0.0.1', port=0):
+    """Start the fake on a background thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--profiles', type=int, default=50)
+    parser.add_argument('--artworks-per-profile', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    fake = FakeSupabase(seed_data(args.profiles, args.artworks_per_profile, seed=args.seed),
+                        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    server, url = serve(fake, args.host, args.port)
+    print(f'Fake Supabase listening on {url}', flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+"""Load-test the server against a local Supabase stand-in.
+
+Starts bench/fake_supabase.py in-process (seeded profiles, artworks, likes and
+saves, with injected upstream latency), launches the server as a subprocess
+pointed at it, then drives concurrent traffic at /upload, /signed-url,
+/profile, /artist-resolver, /image, /search, /feed/trending and /me/dashboard
+and reports per-endpoint p50/p95/p99 latency and throughput.
+
+    cd server
+    python bench/load.py --latency-ms 30 --concurrency 32 --requests 2000
+    python bench/load.py --mode async --scenarios profile,artist-resolver
+    python bench/load.py --mode gunicorn
+    python bench/load.py --json > before.json
+
+Use --target to benchmark an already running server instead; it must share
+--jwt-secret and point its SUPABASE_URL at --fake-url (or a real project).
+"""
+import argparse
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import jwt
+
+from fake_supabase import FakeSupabase, seed_data, serve
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ('upload', 'signed-url', 'profile', 'artist-resolver', 'image', 'search', 'trending', 'dashboard')
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def make_token(secret, supabase_url, user_id, ttl=3600):
+    now = int(time.time())
+    return jwt.encode({
+        'sub': user_id,
+        'aud': 'authenticated',
+        'iss': f"{supabase_url.rstrip('/')}/auth/v1",
+        'role': 'authenticated',
+        'iat': now,
+        'exp': now + ttl,
+    }, secret, algorithm='HS256')
+
+
+def sample_image(size):
+    """A PNG of roughly `size` bytes, narrower than every derivative width so
+    uploads don't queue resize work that would skew the numbers."""
+    try:
+        from PIL import Image
+        buf = io.BytesIO()
+        Image.frombytes('RGB', (64, 64), os.urandom(64 * 64 * 3)).save(buf, 'PNG')
+        data = buf.getvalue()
+        # Pad with an ignored trailing chunk of random bytes to reach the target size
+        return data + os.urandom(max(0, size - len(data)))
+    except ImportError:
+        return os.urandom(size)
+
+
+class Scenario:
+    def __init__(self, name, db, tokens, image):
+        self.name = name
+        self.db = db
+        self.tokens = tokens
+        self.image = image
+        self.rng = random.Random(name)
+
+    def request(self, client):
+        profile = self.rng.choice(self.db['profiles'])
+        headers = {'Authorization': f"Bearer {self.tokens[profile['id']]}"}
+        if self.name == 'upload':
+            name = f'bench-{self.rng.getrandbits(32):08x}.png'
+            # Unique trailing bytes so content-addressed dedup doesn't skip the storage write
+            content = self.image + os.urandom(16)
+            return client.post('/upload', headers=headers,
+                               files={'file': (name, content, 'image/png')},
+                               data={'title': 'Bench upload', 'tags': 'bench'})
+        if self.name == 'signed-url':
+            art = self.rng.choice(self.db['artworks'])
+            return client.get('/signed-url', headers=headers, params={'path': art['image_url']})
+        if self.name == 'profile':
+            return client.get('/profile', headers=headers)
+        if self.name == 'artist-resolver':
+            return client.get('/artist-resolver', params={'handle': profile['handle']})
+        if self.name == 'image':
+            art = self.rng.choice(self.db['artworks'])
+            return client.get(f"/image/artworks/{art['image_url']}", headers=headers)
+        if self.name == 'search':
+            art = self.rng.choice(self.db['artworks'])
+            return client.get('/search', headers=headers, params={'q': art['title'][:3], 'tags': art['tags'][0]})
+        if self.name == 'trending':
+            return client.get('/feed/trending', headers=headers, params={'offset': self.rng.randrange(0, 48, 24), 'limit': 24})
+        if self.name == 'dashboard':
+            return client.get('/me/dashboard', headers=headers)
+        raise ValueError(f'unknown scenario {self.name}')
+
+
+def run_scenario(scenario, base_url, concurrency, requests, duration, warmup):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    with httpx.Client(base_url=base_url, limits=limits, timeout=60) as client:
+        for _ in range(warmup):
+            scenario.request(client)
+
+        latencies = []
+        errors = {}
+        lock = threading.Lock()
+        remaining = [requests]
+        deadline = time.perf_counter() + duration if duration else None
+
+        def take():
+            with lock:
+                if deadline is not None:
+                    return time.perf_counter() < deadline
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+                return True
+
+        def worker():
+            while take():
+                started = time.perf_counter()
+                try:
+                    status = scenario.request(client).status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    if not (isinstance(status, int) and status < 400):
+                        errors[str(status)] = errors.get(str(status), 0) + 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for f in [pool.submit(worker) for _ in range(concurrency)]:
+                f.result()
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'scenario': scenario.name,
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(wall, 3),
+        'rps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+SERVER_MODES = ('wsgi', 'async', 'gunicorn')
+
+
+def server_command(mode):
+    if mode == 'async':
+        return [sys.executable, 'async_app.py']
+    if mode == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app']
+    return [sys.executable, '-c',
+            'import os, app; from werkzeug.serving import run_simple; '
+            "run_simple('127.0.0.1', int(os.environ['PORT']), app.app, threaded=True)"]
+
+
+def server_env(port, fake_url, secret, **extra):
+    return dict(os.environ,
+                SUPABASE_URL=fake_url,
+                SUPABASE_SERVICE_KEY='bench-service-key',
+                SUPABASE_JWT_SECRET=secret,
+                PORT=str(port),
+                STORAGE_HTTP2='0',
+                IMAGE_CACHE_DIR=tempfile.mkdtemp(prefix='artichoke-bench-images-'),
+                **extra)
+
+
+def wait_until_up(proc, base_url, log_path, timeout=60, path='/healthz', interval=0.2):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'server exited with {proc.returncode}; see {log_path}')
+        try:
+            if httpx.get(f'{base_url}{path}', timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(interval)
+    proc.terminate()
+    raise RuntimeError(f'server did not become ready; see {log_path}')
+
+
+def start_server(mode, port, fake_url, secret, log_path):
+    log = open(log_path, 'wb')
+    proc = subprocess.Popen(server_command(mode), cwd=SERVER_DIR, env=server_env(port, fake_url, secret),
+                            stdout=log, stderr=subprocess.STDOUT)
+    base_url = f'http://127.0.0.1:{port}'
+    wait_until_up(proc, base_url, log_path)
+    return proc, base_url
+
+
+def print_table(results):
+    header = f"{'scenario':<18}{'reqs':>8}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['scenario']:<18}{r['requests']:>8}{sum(r['errors'].values()):>8}{r['rps']:>10}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}")
+    for r in results:
+        if r['errors']:
+            print(f"{r['scenario']} errors: {r['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated subset of ' + ', '.join(SCENARIOS))
+    parser.add_argument('--mode', choices=SERVER_MODES, default='wsgi', help='server to launch (ignored with --target)')
+    parser.add_argument('--target', help='benchmark an already running server at this URL')
+    parser.add_argument('--fake-url', help='with --target: base URL of the fake the target talks to (defaults to starting one)')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000, help='requests per scenario')
+    parser.add_argument('--duration', type=float, default=0, help='seconds per scenario; overrides --requests')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='injected upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=5.0)
+    parser.add_argument('--profiles', type=int, default=50)
+    parser.add_argument('--artworks-per-profile', type=int, default=20)
+    parser.add_argument('--likes', type=int, default=2000)
+    parser.add_argument('--saves', type=int, default=1000)
+    parser.add_argument('--upload-bytes', type=int, default=64 * 1024)
+    parser.add_argument('--object-bytes', type=int, default=256 * 1024, help='size of each seeded artwork object')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--jwt-secret', default='bench-jwt-secret')
+    parser.add_argument('--server-log', default=os.path.join(tempfile.gettempdir(), 'artichoke-bench-server.log'))
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    names = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+
+    db = seed_data(args.profiles, args.artworks_per_profile, args.likes, args.saves, seed=args.seed)
+    fake_server = None
+    fake_url = args.fake_url
+    fake = None
+    if not fake_url:
+        fake = FakeSupabase(db, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, object_bytes=args.object_bytes)
+        fake_server, fake_url = serve(fake)
+
+    proc = None
+    try:
+        if args.target:
+            base_url = args.target.rstrip('/')
+        else:
+            proc, base_url = start_server(args.mode, args.port, fake_url, args.jwt_secret, args.server_log)
+
+        tokens = {p['id']: make_token(args.jwt_secret, fake_url, p['id']) for p in db['profiles']}
+        image = sample_image(args.upload_bytes)
+        results = []
+        for name in names:
+            upstream_before = fake.requests if fake else None
+            result = run_scenario(Scenario(name, db, tokens, image), base_url,
+                                  args.concurrency, args.requests, args.duration, args.warmup)
+            if fake:
+                result['upstream_calls'] = fake.requests - upstream_before
+            results.append(result)
+
+        summary = {
+            'mode': 'target' if args.target else args.mode,
+            'concurrency': args.concurrency,
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'results': results,
+        }
+        if args.json:
+            print(json.dumps(summary, indent=2))
+        else:
+            print(f"mode={summary['mode']} concurrency={args.concurrency} upstream latency={args.latency_ms}+{args.jitter_ms}ms")
+            print_table(results)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if fake_server is not None:
+            fake_server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
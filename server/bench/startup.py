@@ -0,0 +1,120 @@
+"""Measure how long the server takes from launch to serving requests.
+
+For each server mode, launches the server against a local Supabase stand-in
+and records, from the moment the process is started:
+
+    listening      first 200 from /healthz
+    ready          first 200 from /readyz (database client built and answering)
+    first request  first 200 from an authenticated /profile call
+
+Each mode is started --runs times and the median is reported.
+
+    cd server
+    python bench/startup.py
+    python bench/startup.py --modes wsgi,gunicorn --runs 10 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from fake_supabase import FakeSupabase, seed_data, serve
+from load import SERVER_DIR, SERVER_MODES, make_token, server_command, server_env
+
+POLL_INTERVAL = 0.005
+
+
+def wait_for(proc, url, headers=None, timeout=60):
+    # Seconds until url answers 200, polling as fast as is reasonable
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'server exited with {proc.returncode}')
+        try:
+            if httpx.get(url, headers=headers, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(POLL_INTERVAL)
+    raise RuntimeError(f'{url} did not answer within {timeout}s')
+
+
+def measure(mode, port, fake_url, secret, token, log_path, workers):
+    env = server_env(port, fake_url, secret, WEB_CONCURRENCY=str(workers))
+    base_url = f'http://127.0.0.1:{port}'
+    with open(log_path, 'ab') as log:
+        started = time.perf_counter()
+        proc = subprocess.Popen(server_command(mode), cwd=SERVER_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            wait_for(proc, f'{base_url}/healthz')
+            listening = time.perf_counter() - started
+            wait_for(proc, f'{base_url}/readyz')
+            ready = time.perf_counter() - started
+            wait_for(proc, f'{base_url}/profile', headers={'Authorization': f'Bearer {token}'})
+            first = time.perf_counter() - started
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    return {'listening': listening, 'ready': ready, 'first_request': first}
+
+
+def import_seconds():
+    # Cost of importing the app alone, i.e. what preloading takes off each worker
+    code = ('import time; t = time.perf_counter(); import app; '
+            'print(time.perf_counter() - t)')
+    env = dict(os.environ, SUPABASE_URL='http://127.0.0.1:9', SUPABASE_SERVICE_KEY='k', SUPABASE_JWT_SECRET='s')
+    out = subprocess.run([sys.executable, '-c', code], cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', default=','.join(SERVER_MODES), help='comma-separated subset of ' + ', '.join(SERVER_MODES))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--port', type=int, default=5098)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='injected upstream latency')
+    parser.add_argument('--jwt-secret', default='bench-jwt-secret')
+    parser.add_argument('--server-log', default=os.path.join(tempfile.gettempdir(), 'artichoke-bench-startup.log'))
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+    unknown = set(modes) - set(SERVER_MODES)
+    if unknown:
+        parser.error(f'unknown modes: {", ".join(sorted(unknown))}')
+
+    db = seed_data(profiles=5, artworks_per_profile=5, likes=20, saves=20)
+    fake_server, fake_url = serve(FakeSupabase(db, latency_ms=args.latency_ms, jitter_ms=0))
+    token = make_token(args.jwt_secret, fake_url, db['profiles'][0]['id'])
+    try:
+        results = {'import_seconds': round(statistics.median(import_seconds() for _ in range(args.runs)), 4), 'modes': {}}
+        for mode in modes:
+            runs = [measure(mode, args.port, fake_url, args.jwt_secret, token, args.server_log, args.workers)
+                    for _ in range(args.runs)]
+            results['modes'][mode] = {k: round(statistics.median(r[k] for r in runs), 4) for k in runs[0]}
+    finally:
+        fake_server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"import app: {results['import_seconds'] * 1000:.0f} ms (median of {args.runs})")
+    header = f"{'mode':<12}{'listening ms':>14}{'ready ms':>12}{'first req ms':>14}"
+    print(header)
+    print('-' * len(header))
+    for mode, r in results['modes'].items():
+        print(f"{mode:<12}{r['listening'] * 1000:>14.0f}{r['ready'] * 1000:>12.0f}{r['first_request'] * 1000:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
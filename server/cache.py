@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """asyncio version of SingleFlight; callers must share one event loop."""
+
+    def __init__(self):
+        self._calls = {}
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        fut = self._calls.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            return await asyncio.shield(fut)
+
+        fut = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting; don't warn about an unretrieved exception
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._calls[key] = fut
+        try:
+            result = await fn()
+            fut.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            self._calls.pop(key, None)
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after a per-entry TTL.
+
+    Keeps hit/miss/eviction counters so endpoints can report how well the
+    cache is doing.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._flights = SingleFlight()
+        self._async_flights = AsyncSingleFlight()
+
+    def get(self, key, default=None):
+        return self._lookup(key, default, count=True)
+
+    def _lookup(self, key, default, count):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._data[key]
+                entry = None
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None, expires_at=None):
+        if expires_at is None:
+            expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_or_load(self, key, loader, ttl=None):
+        """Return the cached value for key, or call loader() once to fill it.
+        Concurrent misses for the same key share a single loader call. None
+        results are returned but not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        def load():
+            # Another caller may have filled the entry while we waited to lead
+            cached = self._lookup(key, None, count=False)
+            if cached is not None:
+                return cached
+            loaded = loader()
+            if loaded is not None:
+                self.set(key, loaded, ttl=ttl)
+            return loaded
+
+        return self._flights.do(key, load)
+
+    async def aget_or_load(self, key, loader, ttl=None):
+        """Like get_or_load, for a coroutine function loader."""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        async def load():
+            cached = self._lookup(key, None, count=False)
+            if cached is not None:
+                return cached
+            loaded = await loader()
+            if loaded is not None:
+                self.set(key, loaded, ttl=ttl)
+            return loaded
+
+        return await self._async_flights.do(key, load)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'coalesced': self._flights.coalesced + self._async_flights.coalesced,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            }
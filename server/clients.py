@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+import logs
+
+CLIENT_INIT_RETRY_SECONDS = float(os.getenv('CLIENT_INIT_RETRY_SECONDS', '5'))
+
+
+class ClientUnavailable(Exception):
+    pass
+
+
+class LazyClient:
+    """Stand-in for a client that is built on first use, once per process.
+
+    Importing the app (e.g. in a preforking server's master) opens no
+    connections; each worker builds its own client after fork. A failed build
+    is logged and retried on a later use, at most every `retry_seconds`,
+    instead of leaving the process without a client for good. Attribute access
+    is forwarded to the real client, and `if not client:` is true while it
+    cannot be built.
+    """
+
+    def __init__(self, factory, name, retry_seconds=CLIENT_INIT_RETRY_SECONDS):
+        self._factory = factory
+        self._name = name
+        self._retry_seconds = retry_seconds
+        self._client = None
+        self._pid = None
+        self._failed_at = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        pid = os.getpid()
+        if self._client is not None and self._pid == pid:
+            return self._client
+        with self._lock:
+            if self._pid != pid:
+                # Never reuse a client (or a failure) inherited across fork()
+                self._client, self._failed_at, self.error = None, None, None
+                self._pid = pid
+            if self._client is not None:
+                return self._client
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self._retry_seconds:
+                raise ClientUnavailable(f'{self._name} client unavailable: {self.error}')
+            started = time.perf_counter()
+            try:
+                self._client = self._factory()
+            except Exception as e:
+                self._failed_at, self.error = time.monotonic(), str(e)
+                logs.error('client.init_failed', client=self._name, error=str(e))
+                raise ClientUnavailable(f'{self._name} client unavailable: {e}') from e
+            self._failed_at, self.error = None, None
+            logs.info('client.initialized', client=self._name, pid=pid,
+                      seconds=round(time.perf_counter() - started, 4))
+            return self._client
+
+    def __bool__(self):
+        try:
+            self.get()
+        except ClientUnavailable:
+            return False
+        return True
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
@@ -0,0 +1,147 @@
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import logs
+
+DERIVATIVE_WIDTHS = tuple(int(w) for w in os.getenv('DERIVATIVE_WIDTHS', '320,640,1280').split(',') if w.strip())
+DERIVATIVE_FORMATS = ('webp', 'jpeg')
+DERIVATIVE_WORKERS = int(os.getenv('DERIVATIVE_WORKERS', '2'))
+COPY_CHUNK_SIZE = 256 * 1024
+
+_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def derivative_path(image_url, width, fmt):
+    """Storage path of a resized variant, under a derivatives/ prefix next to the original.
+    e.g. <user_id>/cat.png -> <user_id>/derivatives/cat.png/w320.webp
+    """
+    folder, _, name = image_url.rpartition('/')
+    prefix = f'{folder}/derivatives/{name}' if folder else f'derivatives/{name}'
+    return f'{prefix}/w{width}.{_EXTENSIONS[fmt]}'
+
+
+def thumbnail_path(row):
+    # Smallest WebP variant recorded on an artworks row, if any
+    derivatives = row.get('derivatives') if isinstance(row, dict) else None
+    if not isinstance(derivatives, dict):
+        return None
+    webp = derivatives.get('webp') or {}
+    if not webp:
+        return None
+    return webp[min(webp, key=int)]
+
+
+def render_derivatives(src_path, widths=DERIVATIVE_WIDTHS, formats=DERIVATIVE_FORMATS):
+    """Resize an image to each width narrower than the original and encode it.
+    Runs in a worker process. Returns [(width, fmt, bytes), ...].
+    """
+    from PIL import Image, ImageOps
+
+    out = []
+    with Image.open(src_path) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ('RGB', 'RGBA'):
+            im = im.convert('RGBA' if im.has_transparency_data else 'RGB')
+        for width in sorted(set(widths)):
+            if width >= im.width:
+                continue
+            height = max(1, round(im.height * width / im.width))
+            resized = im.resize((width, height), Image.Resampling.LANCZOS)
+            for fmt in formats:
+                buf = io.BytesIO()
+                if fmt == 'jpeg':
+                    resized.convert('RGB').save(buf, 'JPEG', quality=82, optimize=True, progressive=True)
+                else:
+                    resized.save(buf, 'WEBP', quality=80, method=4)
+                out.append((width, fmt, buf.getvalue()))
+    return out
+
+
+class DerivativePipeline:
+    """Hands uploaded originals to a process pool for resizing.
+
+    The original is copied to a temp file in fixed-size chunks and its path is
+    sent to a worker process. Finished renders are passed to `store(context,
+    renders)` on a small thread pool, which is where storage writes and row
+    updates happen. Pools are created lazily and per process, and the process
+    pool is replaced when one of its workers dies.
+    """
+
+    def __init__(self, store, workers=DERIVATIVE_WORKERS):
+        self.store = store
+        self.workers = workers
+        self._procs = None
+        self._threads = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pools(self):
+        if self._pid != os.getpid() or self._procs is None:
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._procs = None
+                    self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='derivatives')
+                    self._pid = os.getpid()
+                if self._procs is None:
+                    # spawn: never fork a threaded server process into the pool
+                    self._procs = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                    )
+        return self._procs, self._threads
+
+    def _discard_pool(self, procs):
+        # A worker died (OOM kill, decoder crash) and the pool refuses all further
+        # work; drop it so the next submit builds a new one
+        with self._lock:
+            if self._procs is not procs:
+                return
+            self._procs = None
+        logs.warning('derivatives.pool_broken')
+        procs.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, stream, context):
+        procs, threads = self._pools()
+        stream.seek(0)
+        tmp = tempfile.NamedTemporaryFile(prefix='artwork-', delete=False)
+        try:
+            with tmp:
+                shutil.copyfileobj(stream, tmp, COPY_CHUNK_SIZE)
+            try:
+                future = procs.submit(render_derivatives, tmp.name)
+            except BrokenProcessPool:
+                # Found out only now that a worker died; retry once on a new pool
+                self._discard_pool(procs)
+                procs, threads = self._pools()
+                future = procs.submit(render_derivatives, tmp.name)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+
+        def done(fut):
+            try:
+                renders = fut.result()
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    self._discard_pool(procs)
+                logs.error('derivatives.render_failed', image_url=context.get('image_url'), error=str(e))
+                renders = None
+            finally:
+                os.unlink(tmp.name)
+            if renders:
+                threads.submit(self._store, context, renders)
+
+        future.add_done_callback(done)
+        return future
+
+    def _store(self, context, renders):
+        try:
+            self.store(context, renders)
+        except Exception as e:
+            logs.error('derivatives.store_failed', image_url=context.get('image_url'), error=str(e))
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import logs
+from cache import SingleFlight
+
+IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'artichoke-image-cache')
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(2 * 1024 * 1024 * 1024)))
+
+
+class ObjectNotFound(Exception):
+    pass
+
+
+class DiskLRUCache:
+    """Size-bounded on-disk LRU cache of storage objects.
+
+    Each object is stored as one file named by a hash of (bucket, path), so the
+    web server can send it straight from disk. Recency and sizes are tracked in
+    memory; the index is rebuilt from the directory (oldest access first) on
+    first use, so `root` can still be changed after construction. Concurrent misses for one object share a single download, which is
+    written to a temp file and renamed into place so readers never see a
+    partial file. The index is per process, so each process needs its own root.
+    """
+
+    def __init__(self, fetch, root=IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_BYTES):
+        # fetch(bucket, path, fileobj) writes the object to fileobj and returns its
+        # content type, or raises ObjectNotFound
+        self.fetch = fetch
+        self.root = root
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (size, content_type, fetched_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, bucket, path):
+        return hashlib.sha256(f'{bucket}/{path}'.encode()).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def _load_index(self):
+        # Caller holds the lock
+        if self._loaded:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        found = []
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                full = os.path.join(dirpath, name)
+                if name.startswith('.'):
+                    # Leftover partial download
+                    os.unlink(full)
+                    continue
+                st = os.stat(full)
+                found.append((st.st_atime, name, st.st_size, st.st_mtime))
+        for _, name, size, mtime in sorted(found):
+            self._entries[name] = (size, None, mtime)
+            self._bytes += size
+        self._loaded = True
+        self._evict()
+
+    def _evict(self):
+        # Caller holds the lock
+        while self._bytes > self.max_bytes and self._entries:
+            key, (size, _, _) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                os.unlink(self._file(key))
+            except FileNotFoundError:
+                pass
+
+    def get(self, bucket, path, max_age=None):
+        """Return (file_path, content_type) for a cached object, downloading it on a
+        miss. With `max_age` (seconds), older copies are downloaded again; objects
+        that can change in place in storage should pass one.
+        """
+        key = self._key(bucket, path)
+        with self._lock:
+            self._load_index()
+            entry = self._entries.get(key)
+            if entry is not None and max_age is not None and time.time() - entry[2] > max_age:
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._file(key), entry[1]
+            self.misses += 1
+        content_type = self._flight.do(key, lambda: self._download(key, bucket, path))
+        return self._file(key), content_type
+
+    def _download(self, key, bucket, path):
+        final = self._file(key)
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix='.', dir=os.path.dirname(final))
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                content_type = self.fetch(bucket, path, out)
+                size = out.tell()
+            os.replace(tmp, final)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[0]
+            self._entries[key] = (size, content_type, time.time())
+            self._bytes += size
+            self._evict()
+        logs.hot_debug('image_cache.stored', bucket=bucket, path=path, bytes=size)
+        return content_type
+
+    def discard(self, bucket, path):
+        """Drop one object, e.g. after it has been overwritten in storage."""
+        key = self._key(bucket, path)
+        with self._lock:
+            self._load_index()
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            self._bytes -= entry[0]
+        try:
+            os.unlink(self._file(key))
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'coalesced': self._flight.coalesced,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,63 @@
+import json
+import logging
+import os
+import random
+import sys
+
+# Below the default WARNING level every call costs a single isEnabledFor() check.
+# Per-request events go through hot_debug()/hot_info(), which keep only
+# LOG_SAMPLE_RATE of them; debug()/info() (one-off lifecycle events), warnings
+# and errors are never sampled.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'WARNING').upper()
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.01'))
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        out = {'ts': round(record.created, 3), 'level': record.levelname.lower(), 'event': record.getMessage()}
+        out.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            out['exc'] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str)
+
+
+logger = logging.getLogger('artichoke')
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(JsonFormatter())
+    logger.addHandler(_handler)
+logger.setLevel(LOG_LEVEL)
+logger.propagate = False
+
+
+def log(level, event, sample=None, **fields):
+    """Emit one JSON log line. `sample` (0..1) keeps only that fraction of events."""
+    if not logger.isEnabledFor(level):
+        return
+    if sample is not None and random.random() >= sample:
+        return
+    logger.log(level, event, extra={'fields': fields})
+
+
+def debug(event, **fields):
+    log(logging.DEBUG, event, **fields)
+
+
+def info(event, **fields):
+    log(logging.INFO, event, **fields)
+
+
+def hot_debug(event, **fields):
+    log(logging.DEBUG, event, sample=LOG_SAMPLE_RATE, **fields)
+
+
+def hot_info(event, **fields):
+    log(logging.INFO, event, sample=LOG_SAMPLE_RATE, **fields)
+
+
+def warning(event, **fields):
+    log(logging.WARNING, event, **fields)
+
+
+def error(event, **fields):
+    log(logging.ERROR, event, **fields)
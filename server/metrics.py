@@ -0,0 +1,155 @@
+import threading
+import time
+from bisect import bisect_left
+from urllib.parse import unquote
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+_collectors = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+class Histogram:
+    """Thread-safe labelled histogram rendered in the Prometheus text format."""
+
+    def __init__(self, name, doc, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (+Inf last), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.doc}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._series.items()]
+        for key, counts, total, count in sorted(items):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, ("le", le))} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {total}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {count}')
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+def register_collector(fn):
+    """Register a callable returning extra exposition lines (e.g. cache counters)."""
+    _collectors.append(fn)
+    return fn
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    for fn in _collectors:
+        lines.extend(fn())
+    return '\n'.join(lines) + '\n'
+
+
+http_request_duration = Histogram(
+    'http_request_duration_seconds', 'Latency of requests handled by this server.',
+    ('endpoint', 'method', 'status'),
+)
+upstream_request_duration = Histogram(
+    'upstream_request_duration_seconds', 'Latency of Supabase calls, until response headers arrive.',
+    ('upstream', 'target', 'op', 'status'),
+)
+
+_POSTGREST_OPS = {'GET': 'select', 'HEAD': 'count', 'POST': 'insert', 'PATCH': 'update', 'PUT': 'upsert', 'DELETE': 'delete'}
+_STORAGE_OPS = {'GET': 'download', 'HEAD': 'info', 'POST': 'upload', 'PUT': 'update', 'DELETE': 'remove'}
+
+
+def upstream_labels(method, path):
+    """Map a Supabase request to (upstream, target, op), e.g.
+    GET /rest/v1/profiles -> ('postgrest', 'profiles', 'select')
+    POST /storage/v1/object/sign/artworks -> ('storage', 'artworks', 'sign')
+    """
+    parts = [unquote(p) for p in path.split('/') if p]
+    if parts[:2] == ['rest', 'v1'] and len(parts) > 2:
+        if parts[2] == 'rpc' and len(parts) > 3:
+            return 'postgrest', parts[3], 'rpc'
+        return 'postgrest', parts[2], _POSTGREST_OPS.get(method, method.lower())
+    if parts[:3] == ['storage', 'v1', 'object'] and len(parts) > 3:
+        if parts[3] in ('sign', 'public', 'authenticated') and len(parts) > 4:
+            return 'storage', parts[4], 'sign' if parts[3] == 'sign' else 'download'
+        return 'storage', parts[3], _STORAGE_OPS.get(method, method.lower())
+    return (parts[0] if parts else ''), '', method.lower()
+
+
+def _on_request(request):
+    request.extensions['metrics_started'] = time.perf_counter()
+
+
+def _on_response(response):
+    started = response.request.extensions.get('metrics_started')
+    if started is None:
+        return
+    upstream, target, op = upstream_labels(response.request.method, response.request.url.path)
+    upstream_request_duration.observe(
+        time.perf_counter() - started,
+        upstream=upstream, target=target, op=op, status=response.status_code,
+    )
+
+
+async def _on_request_async(request):
+    _on_request(request)
+
+
+async def _on_response_async(response):
+    _on_response(response)
+
+
+def httpx_event_hooks():
+    """event_hooks for an httpx.Client that time every upstream call."""
+    return {'request': [_on_request], 'response': [_on_response]}
+
+
+def async_httpx_event_hooks():
+    """event_hooks for an httpx.AsyncClient that time every upstream call."""
+    return {'request': [_on_request_async], 'response': [_on_response_async]}
@@ -0,0 +1,40 @@
+-- Content-addressed uploads. /upload hashes each file (SHA-256, hex) while the
+-- request body is parsed, stores it at <user_id>/<sha256>.<ext> and records the
+-- digest here. A later upload of the same bytes by the same creator finds the
+-- earlier row through this index and reuses its object (and derivatives)
+-- instead of sending the bytes to storage again.
+ALTER TABLE artworks ADD COLUMN IF NOT EXISTS content_sha256 TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_artworks_user_id_content_sha256
+  ON artworks(user_id, content_sha256)
+  WHERE content_sha256 IS NOT NULL;
+
+-- Rebuild artworks_with_username. Views expand a.* when they are created, so this
+-- is what makes the columns added by add_artwork_derivatives.sql,
+-- add_like_save_counters.sql, add_updated_at_columns.sql and this file visible to
+-- /feed, /search and trending. Run it after those. CREATE OR REPLACE VIEW cannot
+-- insert columns ahead of username/handle, so the view is dropped and created
+-- again with the privileges it had. security_invoker makes reads through the view
+-- subject to the RLS policies on artworks and profiles, so it shows nobody rows
+-- they could not read from the tables themselves.
+DO $$
+DECLARE
+  grants TEXT;
+BEGIN
+  SELECT string_agg(format('GRANT %s ON artworks_with_username TO %s', g.privilege_type,
+                           CASE WHEN g.grantee = 0 THEN 'PUBLIC' ELSE quote_ident(pg_get_userbyid(g.grantee)) END), '; ')
+  INTO grants
+  FROM pg_class c, aclexplode(c.relacl) g
+  WHERE c.oid = to_regclass('public.artworks_with_username');
+
+  DROP VIEW IF EXISTS artworks_with_username;
+  CREATE VIEW artworks_with_username WITH (security_invoker = true) AS
+    SELECT a.*, p.username, p.handle, p.avatar_url
+    FROM artworks a
+    LEFT JOIN profiles p ON p.id = a.user_id;
+
+  IF grants IS NOT NULL THEN
+    EXECUTE grants;
+  END IF;
+END;
+$$;
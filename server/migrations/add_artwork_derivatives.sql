@@ -0,0 +1,9 @@
+-- Resized WebP/JPEG variants produced after upload, keyed by format then width:
+--   { "webp": { "320": "<user_id>/derivatives/<file>/w320.webp", ... },
+--     "jpeg": { "320": "<user_id>/derivatives/<file>/w320.jpg", ... } }
+-- NULL until the derivative worker has finished (or for images narrower than
+-- the smallest width), in which case clients should use image_url.
+ALTER TABLE artworks ADD COLUMN IF NOT EXISTS derivatives JSONB;
+
+-- artworks_with_username only picks up derivatives once it is rebuilt;
+-- add_artwork_content_hash.sql does that, so run it after this file.
@@ -0,0 +1,105 @@
+-- Denormalized like/save counts on artworks, kept up to date by triggers, so a
+-- card can show its counts without a count(*) over likes/saves.
+ALTER TABLE artworks
+  ADD COLUMN IF NOT EXISTS like_count INTEGER NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS save_count INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill from existing rows
+UPDATE artworks a SET
+  like_count = (SELECT count(*) FROM likes l WHERE l.artwork_id = a.id),
+  save_count = (SELECT count(*) FROM saves s WHERE s.artwork_id = a.id);
+
+-- SECURITY DEFINER: users insert/delete their own likes and saves under RLS but
+-- cannot update other people's artworks rows themselves.
+CREATE OR REPLACE FUNCTION bump_artwork_counter()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_TABLE_NAME = 'likes' THEN
+    IF TG_OP = 'INSERT' THEN
+      UPDATE artworks SET like_count = like_count + 1 WHERE id = NEW.artwork_id;
+    ELSE
+      UPDATE artworks SET like_count = GREATEST(like_count - 1, 0) WHERE id = OLD.artwork_id;
+    END IF;
+  ELSE
+    IF TG_OP = 'INSERT' THEN
+      UPDATE artworks SET save_count = save_count + 1 WHERE id = NEW.artwork_id;
+    ELSE
+      UPDATE artworks SET save_count = GREATEST(save_count - 1, 0) WHERE id = OLD.artwork_id;
+    END IF;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS likes_count_trg ON likes;
+CREATE TRIGGER likes_count_trg
+  AFTER INSERT OR DELETE ON likes
+  FOR EACH ROW EXECUTE FUNCTION bump_artwork_counter();
+
+DROP TRIGGER IF EXISTS saves_count_trg ON saves;
+CREATE TRIGGER saves_count_trg
+  AFTER INSERT OR DELETE ON saves
+  FOR EACH ROW EXECUTE FUNCTION bump_artwork_counter();
+
+-- Apply a batch of like/save changes for one user in a single call.
+-- p_ops: [{ "artwork_id": uuid, "kind": "like" | "save", "value": bool }, ...]
+-- (one entry per artwork/kind). Returns the new state of every touched artwork:
+--   [{ "artwork_id", "like_count", "save_count", "liked", "saved" }, ...]
+-- Ops for artworks that do not exist (e.g. deleted since the client loaded them)
+-- are skipped rather than failing the whole batch; they are absent from the result.
+CREATE OR REPLACE FUNCTION apply_interactions(p_user_id UUID, p_ops JSONB)
+RETURNS JSON
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+DECLARE
+  result JSON;
+BEGIN
+  INSERT INTO likes (user_id, artwork_id)
+  SELECT p_user_id, a.id
+  FROM jsonb_array_elements(p_ops) op
+  JOIN artworks a ON a.id = (op->>'artwork_id')::uuid
+  WHERE op->>'kind' = 'like' AND (op->>'value')::boolean
+  ON CONFLICT (user_id, artwork_id) DO NOTHING;
+
+  DELETE FROM likes l
+  USING jsonb_array_elements(p_ops) op
+  WHERE op->>'kind' = 'like' AND NOT (op->>'value')::boolean
+    AND l.user_id = p_user_id AND l.artwork_id = (op->>'artwork_id')::uuid;
+
+  INSERT INTO saves (user_id, artwork_id)
+  SELECT p_user_id, a.id
+  FROM jsonb_array_elements(p_ops) op
+  JOIN artworks a ON a.id = (op->>'artwork_id')::uuid
+  WHERE op->>'kind' = 'save' AND (op->>'value')::boolean
+  ON CONFLICT (user_id, artwork_id) DO NOTHING;
+
+  DELETE FROM saves s
+  USING jsonb_array_elements(p_ops) op
+  WHERE op->>'kind' = 'save' AND NOT (op->>'value')::boolean
+    AND s.user_id = p_user_id AND s.artwork_id = (op->>'artwork_id')::uuid;
+
+  SELECT COALESCE(json_agg(json_build_object(
+    'artwork_id', a.id,
+    'like_count', a.like_count,
+    'save_count', a.save_count,
+    'liked', EXISTS (SELECT 1 FROM likes l WHERE l.user_id = p_user_id AND l.artwork_id = a.id),
+    'saved', EXISTS (SELECT 1 FROM saves s WHERE s.user_id = p_user_id AND s.artwork_id = a.id)
+  )), '[]'::json)
+  INTO result
+  FROM artworks a
+  WHERE a.id IN (SELECT DISTINCT (op->>'artwork_id')::uuid FROM jsonb_array_elements(p_ops) op);
+
+  RETURN result;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION apply_interactions(UUID, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION apply_interactions(UUID, JSONB) TO service_role;
+
+-- artworks_with_username only picks up like_count and save_count once it is
+-- rebuilt; add_artwork_content_hash.sql does that, so run it after this file.
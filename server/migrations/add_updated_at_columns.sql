@@ -0,0 +1,32 @@
+-- Row versions for conditional GETs (ETag / If-None-Match) on /profile and
+-- /artist-resolver. updated_at moves on every UPDATE, including the counter
+-- bumps from add_like_save_counters.sql and derivative paths written after
+-- upload, so an artist page's ETag changes whenever anything it shows does.
+ALTER TABLE profiles ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE artworks ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+-- Existing artworks start at their creation time rather than at migration time
+UPDATE artworks SET updated_at = created_at WHERE created_at IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION touch_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.updated_at = now();
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS profiles_touch_updated_at ON profiles;
+CREATE TRIGGER profiles_touch_updated_at
+  BEFORE UPDATE ON profiles
+  FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+DROP TRIGGER IF EXISTS artworks_touch_updated_at ON artworks;
+CREATE TRIGGER artworks_touch_updated_at
+  BEFORE UPDATE ON artworks
+  FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+-- artworks_with_username only picks up updated_at once it is rebuilt;
+-- add_artwork_content_hash.sql does that, so run it after this file.
@@ -0,0 +1,8 @@
+-- Keyset pagination for GET /feed: newest public artworks first, ties broken by id
+CREATE INDEX IF NOT EXISTS idx_artworks_feed
+  ON artworks(created_at DESC, id DESC)
+  WHERE is_public;
+
+-- Per-viewer like/save lookups on a feed page hit the (user_id, artwork_id)
+-- unique indexes from create_likes_saves_tables.sql together with
+-- idx_likes_user_id / idx_saves_user_id.
@@ -0,0 +1,44 @@
+-- Resolve an artist page in a single round trip.
+-- Matches the input against profiles.handle, profiles.id (when it is a uuid) and
+-- profiles.username, preferring handle > id > username, and returns the profile
+-- together with its artworks ordered newest first:
+--   { "profile": {...} | null, "artworks": [...] }
+
+CREATE INDEX IF NOT EXISTS idx_profiles_handle ON profiles(handle);
+CREATE INDEX IF NOT EXISTS idx_profiles_username ON profiles(username);
+CREATE INDEX IF NOT EXISTS idx_artworks_user_id_created_at ON artworks(user_id, created_at DESC);
+
+CREATE OR REPLACE FUNCTION resolve_artist(p_handle TEXT)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  WITH match AS (
+    SELECT p.*
+    FROM profiles p
+    WHERE p.handle = p_handle
+       OR p.username = p_handle
+       OR p.id = CASE
+            WHEN p_handle ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+            THEN p_handle::uuid
+          END
+    ORDER BY CASE
+      WHEN p.handle = p_handle THEN 0
+      WHEN p.username = p_handle THEN 2
+      ELSE 1
+    END
+    LIMIT 1
+  )
+  SELECT json_build_object(
+    'profile', (SELECT row_to_json(m) FROM match m),
+    'artworks', COALESCE((
+      SELECT json_agg(a ORDER BY a.created_at DESC)
+      FROM artworks a
+      WHERE a.user_id = (SELECT id FROM match)
+    ), '[]'::json)
+  );
+$$;
+
+REVOKE ALL ON FUNCTION resolve_artist(TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION resolve_artist(TEXT) TO service_role;
@@ -0,0 +1,57 @@
+-- Trending artworks for GET /feed/trending. The server calls this every
+-- TRENDING_REFRESH_INTERVAL seconds and serves the result from memory.
+--
+-- Each like or save adds weight * 0.5 ^ (age / half-life) to its artwork's
+-- score, so activity from one half-life ago counts half as much as activity now.
+-- Interactions older than p_since are skipped; the server passes a cutoff of
+-- several half-lives, by which point they would add almost nothing.
+-- Returns the top p_limit public artworks (p_columns of artworks_with_username,
+-- all of them when NULL) with their score, highest first.
+
+CREATE INDEX IF NOT EXISTS idx_likes_created_at ON likes(created_at);
+CREATE INDEX IF NOT EXISTS idx_saves_created_at ON saves(created_at);
+
+CREATE OR REPLACE FUNCTION trending_artworks(
+  p_since TIMESTAMPTZ,
+  p_half_life_seconds DOUBLE PRECISION,
+  p_like_weight DOUBLE PRECISION DEFAULT 1,
+  p_save_weight DOUBLE PRECISION DEFAULT 2,
+  p_limit INTEGER DEFAULT 1000,
+  p_columns TEXT[] DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  WITH events AS (
+    SELECT artwork_id, p_like_weight AS weight, created_at FROM likes WHERE created_at >= p_since
+    UNION ALL
+    SELECT artwork_id, p_save_weight AS weight, created_at FROM saves WHERE created_at >= p_since
+  ),
+  scores AS (
+    SELECT artwork_id,
+           SUM(weight * power(0.5, EXTRACT(EPOCH FROM (now() - created_at)) / p_half_life_seconds)) AS score
+    FROM events
+    GROUP BY artwork_id
+  ),
+  ranked AS (
+    SELECT to_jsonb(a) AS row, a.id, a.created_at, s.score
+    FROM scores s
+    JOIN artworks_with_username a ON a.id = s.artwork_id
+    WHERE a.is_public
+    ORDER BY s.score DESC, a.created_at DESC, a.id DESC
+    LIMIT p_limit
+  )
+  SELECT COALESCE(
+    json_agg(pick_columns(r.row, p_columns) || jsonb_build_object('score', r.score)
+             ORDER BY r.score DESC, r.created_at DESC, r.id DESC),
+    '[]'::json
+  )
+  FROM ranked r;
+$$;
+
+REVOKE ALL ON FUNCTION trending_artworks(TIMESTAMPTZ, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, INTEGER, TEXT[])
+  FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION trending_artworks(TIMESTAMPTZ, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, INTEGER, TEXT[])
+  TO service_role;
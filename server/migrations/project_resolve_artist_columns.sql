@@ -0,0 +1,61 @@
+-- Column projection for resolve_artist (see create_resolve_artist_function.sql).
+-- The server passes the columns an artist page actually shows, so wide rows
+-- are trimmed in the database instead of after they have crossed the wire.
+-- NULL column lists keep the old select-everything behaviour.
+
+-- Keep only the listed keys of a row (all of them when p_columns is NULL)
+CREATE OR REPLACE FUNCTION pick_columns(p_row JSONB, p_columns TEXT[])
+RETURNS JSONB
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT CASE
+    WHEN p_columns IS NULL THEN p_row
+    ELSE COALESCE(
+      (SELECT jsonb_object_agg(key, value) FROM jsonb_each(p_row) WHERE key = ANY(p_columns)),
+      '{}'::jsonb
+    )
+  END;
+$$;
+
+-- The one-argument version would make calls with only p_handle ambiguous
+DROP FUNCTION IF EXISTS resolve_artist(TEXT);
+
+CREATE OR REPLACE FUNCTION resolve_artist(
+  p_handle TEXT,
+  p_profile_columns TEXT[] DEFAULT NULL,
+  p_artwork_columns TEXT[] DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  WITH match AS (
+    SELECT p.*
+    FROM profiles p
+    WHERE p.handle = p_handle
+       OR p.username = p_handle
+       OR p.id = CASE
+            WHEN p_handle ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+            THEN p_handle::uuid
+          END
+    ORDER BY CASE
+      WHEN p.handle = p_handle THEN 0
+      WHEN p.username = p_handle THEN 2
+      ELSE 1
+    END
+    LIMIT 1
+  )
+  SELECT json_build_object(
+    'profile', (SELECT pick_columns(to_jsonb(m), p_profile_columns) FROM match m),
+    'artworks', COALESCE((
+      SELECT json_agg(pick_columns(to_jsonb(a), p_artwork_columns) ORDER BY a.created_at DESC)
+      FROM artworks a
+      WHERE a.user_id = (SELECT id FROM match)
+    ), '[]'::json)
+  );
+$$;
+
+REVOKE ALL ON FUNCTION resolve_artist(TEXT, TEXT[], TEXT[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION resolve_artist(TEXT, TEXT[], TEXT[]) TO service_role;
@@ -0,0 +1,226 @@
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+import logs
+
+SEARCH_REBUILD_INTERVAL = float(os.getenv('SEARCH_REBUILD_INTERVAL', '300'))
+# Until the first build succeeds it is retried this often, whatever the rebuild interval
+SEARCH_RETRY_INTERVAL = float(os.getenv('SEARCH_RETRY_INTERVAL', '5'))
+SEARCH_PAGE_SIZE = 1000
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+# Score per matched query term, by where and how it matched
+TAG_EXACT, TAG_PREFIX, TITLE_EXACT, TITLE_PREFIX = 4.0, 2.0, 3.0, 1.5
+
+
+def tokenize(text):
+    return _TOKEN.findall((text or '').lower())
+
+
+def normalize_tag(tag):
+    return str(tag).strip().lower()
+
+
+class _Postings:
+    """token -> set of artwork ids, plus a sorted vocabulary for prefix lookups."""
+
+    def __init__(self):
+        self.ids = {}
+        self.vocab = []
+
+    def add(self, token, doc_id):
+        ids = self.ids.get(token)
+        if ids is None:
+            ids = self.ids[token] = set()
+            insort(self.vocab, token)
+        ids.add(doc_id)
+
+    def remove(self, token, doc_id):
+        ids = self.ids.get(token)
+        if ids is None:
+            return
+        ids.discard(doc_id)
+        if not ids:
+            del self.ids[token]
+            i = bisect_left(self.vocab, token)
+            if i < len(self.vocab) and self.vocab[i] == token:
+                del self.vocab[i]
+
+    def exact(self, token):
+        return self.ids.get(token, ())
+
+    def prefixed(self, prefix):
+        # Every token starting with prefix (excluding prefix itself) and its ids
+        i = bisect_left(self.vocab, prefix)
+        while i < len(self.vocab) and self.vocab[i].startswith(prefix):
+            token = self.vocab[i]
+            if token != prefix:
+                yield self.ids[token]
+            i += 1
+
+
+class SearchIndex:
+    """In-memory inverted index over public artwork titles and tags.
+
+    Built from the database by `load_all` (a callable yielding artwork rows),
+    rebuilt every SEARCH_REBUILD_INTERVAL seconds in the background to pick up
+    edits and deletes made elsewhere, and updated in place with `add` as this
+    process inserts artworks. Rows added while a rebuild is running are replayed
+    onto the new index before it is swapped in.
+    """
+
+    def __init__(self, load_all, rebuild_interval=SEARCH_REBUILD_INTERVAL):
+        self.load_all = load_all
+        self.rebuild_interval = rebuild_interval
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._docs = {}
+        self._title = _Postings()
+        self._tags = _Postings()
+        self._pending = None
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        """Build in a background thread, then keep rebuilding. Safe to call per process."""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='search-index', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.rebuild()
+            except Exception as e:
+                logs.error('search_index.build_failed', error=str(e))
+            if not self.ready.is_set():
+                time.sleep(SEARCH_RETRY_INTERVAL)
+                continue
+            if self.rebuild_interval <= 0:
+                return
+            time.sleep(self.rebuild_interval)
+
+    def rebuild(self):
+        started = time.perf_counter()
+        with self._lock:
+            self._pending = []
+        try:
+            docs, title, tags = {}, _Postings(), _Postings()
+            for row in self.load_all():
+                self._index(row, docs, title, tags)
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            for row in self._pending:
+                self._index(row, docs, title, tags)
+            self._docs, self._title, self._tags = docs, title, tags
+            self._pending = None
+        self.ready.set()
+        logs.info('search_index.built', docs=len(docs), seconds=round(time.perf_counter() - started, 3))
+
+    @staticmethod
+    def _doc(row):
+        return {
+            'id': row.get('id'),
+            'user_id': row.get('user_id'),
+            'title': row.get('title'),
+            'image_url': row.get('image_url'),
+            'tags': row.get('tags') or [],
+            'created_at': row.get('created_at'),
+            'username': row.get('username'),
+            'handle': row.get('handle'),
+            'thumbnail_path': row.get('thumbnail_path'),
+        }
+
+    def _index(self, row, docs, title, tags):
+        doc_id = row.get('id')
+        if doc_id is None:
+            return
+        old = docs.pop(doc_id, None)
+        if old is not None:
+            self._unindex(old, title, tags)
+        if row.get('is_public') is False:
+            return
+        doc = docs[doc_id] = self._doc(row)
+        for token in set(tokenize(doc['title'])):
+            title.add(token, doc_id)
+        for tag in {normalize_tag(t) for t in doc['tags'] if normalize_tag(t)}:
+            tags.add(tag, doc_id)
+
+    @staticmethod
+    def _unindex(doc, title, tags):
+        for token in set(tokenize(doc['title'])):
+            title.remove(token, doc['id'])
+        for tag in {normalize_tag(t) for t in doc['tags']}:
+            tags.remove(tag, doc['id'])
+
+    def add(self, row):
+        """Index (or re-index) one artwork row."""
+        with self._lock:
+            self._index(row, self._docs, self._title, self._tags)
+            if self._pending is not None:
+                self._pending.append(row)
+
+    def search(self, q='', tags=(), offset=0, limit=24):
+        """Rank public artworks whose title or tags match every term of `q`, exactly
+        or as a prefix, and that carry every tag in `tags`.
+        Returns (total, [doc, ...]) for the requested page.
+        """
+        terms = tokenize(q)
+        required = [normalize_tag(t) for t in tags if normalize_tag(t)]
+        with self._lock:
+            candidates = None
+            for tag in required:
+                ids = self._tags.exact(tag)
+                candidates = set(ids) if candidates is None else candidates & ids
+                if not candidates:
+                    return 0, []
+
+            scores = {}
+            for term in terms:
+                term_scores = {}
+                for ids, weight in ((self._tags.exact(term), TAG_EXACT), (self._title.exact(term), TITLE_EXACT)):
+                    for doc_id in ids:
+                        term_scores[doc_id] = max(term_scores.get(doc_id, 0.0), weight)
+                for postings, weight in ((self._tags, TAG_PREFIX), (self._title, TITLE_PREFIX)):
+                    for ids in postings.prefixed(term):
+                        for doc_id in ids:
+                            if doc_id not in term_scores:
+                                term_scores[doc_id] = weight
+                matched = set(term_scores)
+                candidates = matched if candidates is None else candidates & matched
+                if not candidates:
+                    return 0, []
+                for doc_id in candidates:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + term_scores[doc_id]
+
+            if candidates is None:
+                # Neither q nor tags: nothing to search for
+                return 0, []
+            docs = [self._docs[d] for d in candidates]
+
+        # Shorter titles are closer matches for the same terms; newest first on ties
+        def rank(doc):
+            length = len(tokenize(doc['title'])) or 1
+            return (scores.get(doc['id'], 0.0) / math.sqrt(length), doc.get('created_at') or '')
+
+        docs.sort(key=rank, reverse=True)
+        return len(docs), docs[offset:offset + limit]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'docs': len(self._docs),
+                'title_terms': len(self._title.ids),
+                'tags': len(self._tags.ids),
+                'ready': self.ready.is_set(),
+            }
@@ -0,0 +1,47 @@
+import orjson
+
+# Columns each list endpoint returns by default. Anything else on the rows (and
+# anything added to the tables later) stays server-side unless listed here.
+ARTIST_PROFILE_COLUMNS = (
+    'id', 'username', 'handle', 'bio', 'avatar_url', 'profile_image',
+    'email', 'instagram', 'website', 'user_type', 'created_at', 'updated_at',
+)
+ARTWORK_COLUMNS = (
+    'id', 'user_id', 'title', 'description', 'image_url', 'tags', 'is_public',
+    'created_at', 'updated_at', 'like_count', 'save_count', 'derivatives',
+)
+FEED_COLUMNS = ARTWORK_COLUMNS + ('username', 'handle', 'avatar_url')
+
+# Computed per row by the server rather than selected
+ARTWORK_EXTRA_FIELDS = ('thumbnail_path',)
+FEED_EXTRA_FIELDS = ('thumbnail_path', 'liked_by_me', 'saved_by_me')
+
+
+def parse_fields(raw, allowed):
+    """Parse a `fields=a,b,c` query parameter against the allowed names.
+    Returns a tuple of field names, or None when the parameter is absent (use
+    the endpoint's default projection). Raises ValueError for unknown names.
+    """
+    if raw is None or not raw.strip():
+        return None
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def project(rows, fields):
+    # New dicts only when a narrower projection was asked for; otherwise the rows are used as-is
+    if fields is None:
+        return rows
+    return [{f: row[f] for f in fields if f in row} for row in rows]
+
+
+def dumps(payload):
+    """Encode straight to JSON bytes. datetime/date/UUID values are handled natively."""
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+
+def json_response(response_class, payload, status=200, headers=None):
+    return response_class(dumps(payload), status=status, headers=headers, mimetype='application/json')
@@ -0,0 +1,182 @@
+import os
+import threading
+from urllib.parse import quote
+
+import httpx
+
+
+def is_safe_object_path(object_path):
+    """True when every segment of `object_path` is a plain name (no '', '.' or '..')."""
+    return bool(object_path) and all(seg not in ('', '.', '..') for seg in object_path.split('/'))
+
+
+def _segment(name):
+    return quote(name, safe='')
+
+
+def object_url(bucket, object_path):
+    """`/object/<bucket>/<path>` with every segment percent-encoded, so a
+    caller-supplied path can never resolve outside the bucket."""
+    if not is_safe_object_path(bucket) or '/' in bucket or not is_safe_object_path(object_path):
+        raise ValueError(f'Invalid object path: {bucket}/{object_path}')
+    return f'/object/{_segment(bucket)}/' + '/'.join(_segment(seg) for seg in object_path.split('/'))
+
+
+class _BaseGateway:
+    def __init__(self, supabase_url, service_key, pool_size=None, keepalive=None,
+                 keepalive_expiry=None, connect_timeout=None, read_timeout=None, http2=None, event_hooks=None):
+        self.base_url = f"{supabase_url.rstrip('/')}/storage/v1"
+        self.service_key = service_key
+        self.pool_size = pool_size or int(os.getenv('STORAGE_POOL_SIZE', '20'))
+        self.keepalive = keepalive or int(os.getenv('STORAGE_POOL_KEEPALIVE', str(self.pool_size)))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv('STORAGE_KEEPALIVE_EXPIRY', '60'))
+        self.connect_timeout = connect_timeout or float(os.getenv('STORAGE_CONNECT_TIMEOUT', '5'))
+        self.read_timeout = read_timeout or float(os.getenv('STORAGE_READ_TIMEOUT', '60'))
+        if http2 is None:
+            http2 = os.getenv('STORAGE_HTTP2', '1').lower() not in ('0', 'false', 'no')
+        self.http2 = http2
+        self.event_hooks = event_hooks
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _client_kwargs(self):
+        return dict(
+            base_url=self.base_url,
+            http2=self.http2,
+            headers={'apikey': self.service_key},
+            event_hooks=self.event_hooks,
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                self.read_timeout,
+                connect=self.connect_timeout,
+                pool=self.connect_timeout,
+            ),
+        )
+
+    def _auth(self, token=None):
+        return {'Authorization': f'Bearer {token or self.service_key}'}
+
+    def _upload_headers(self, content_type, token, size, upsert):
+        headers = self._auth(token)
+        headers['Content-Type'] = content_type or 'application/octet-stream'
+        if upsert:
+            headers['x-upsert'] = 'true'
+        if size is not None:
+            headers['Content-Length'] = str(size)
+        return headers
+
+    def _signed_items(self, resp):
+        resp.raise_for_status()
+        out = []
+        for item in resp.json():
+            url = item.get('signedURL')
+            out.append({
+                'path': item.get('path'),
+                'signedURL': f"{self.base_url}/{url.lstrip('/')}" if url else None,
+                'error': item.get('error'),
+            })
+        return out
+
+
+class StorageGateway(_BaseGateway):
+    """Supabase Storage client backed by one long-lived, pooled httpx client.
+
+    Connections (and their TLS sessions) are kept alive and reused across
+    requests instead of being opened per upload. The underlying client is
+    created lazily and per process, so it is safe to build the gateway before
+    a preforking server forks its workers.
+    """
+
+    @property
+    def client(self):
+        # Connection pools must not be shared across fork(), so rebuild per process
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._client = httpx.Client(**self._client_kwargs())
+                    self._pid = os.getpid()
+        return self._client
+
+    def upload(self, method, bucket, object_path, content, content_type=None, token=None, size=None, upsert=False):
+        """Upload an object. `content` may be bytes or an iterable of byte chunks.
+        `token` is the bearer used for storage ownership (defaults to the service key).
+        Returns the httpx.Response.
+        """
+        headers = self._upload_headers(content_type, token, size, upsert)
+        return self.client.request(method, object_url(bucket, object_path), content=content, headers=headers)
+
+    def download(self, bucket, object_path, fileobj, chunk_size=256 * 1024):
+        """Stream an object into `fileobj` with the service key, chunk by chunk.
+        Returns the httpx.Response; the body is only written on success.
+        """
+        with self.client.stream('GET', object_url(bucket, object_path), headers=self._auth()) as resp:
+            if resp.is_success:
+                for chunk in resp.iter_bytes(chunk_size):
+                    fileobj.write(chunk)
+            else:
+                resp.read()
+        return resp
+
+    def delete(self, bucket, object_path):
+        """Remove one object with the service key. Returns the httpx.Response."""
+        return self.client.delete(object_url(bucket, object_path), headers=self._auth())
+
+    def create_signed_urls(self, bucket, paths, expires_in):
+        """Sign many paths in one bucket with a single request.
+        Returns a list of {'path', 'signedURL', 'error'} dicts with absolute URLs.
+        """
+        resp = self.client.post(
+            f'/object/sign/{_segment(bucket)}',
+            json={'paths': list(paths), 'expiresIn': int(expires_in)},
+            headers=self._auth(),
+        )
+        return self._signed_items(resp)
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+            self._client = None
+            self._pid = None
+
+
+class AsyncStorageGateway(_BaseGateway):
+    """asyncio counterpart of StorageGateway for the async serving mode.
+
+    Must be used from a single event loop; the pooled httpx.AsyncClient is
+    created on first use inside that loop.
+    """
+
+    @property
+    def client(self):
+        if self._client is None or self._pid != os.getpid():
+            self._client = httpx.AsyncClient(**self._client_kwargs())
+            self._pid = os.getpid()
+        return self._client
+
+    async def upload(self, method, bucket, object_path, content, content_type=None, token=None, size=None, upsert=False):
+        """Upload an object. `content` may be bytes or an async iterable of byte chunks."""
+        headers = self._upload_headers(content_type, token, size, upsert)
+        return await self.client.request(method, object_url(bucket, object_path), content=content, headers=headers)
+
+    async def delete(self, bucket, object_path):
+        return await self.client.delete(object_url(bucket, object_path), headers=self._auth())
+
+    async def create_signed_urls(self, bucket, paths, expires_in):
+        resp = await self.client.post(
+            f'/object/sign/{_segment(bucket)}',
+            json={'paths': list(paths), 'expiresIn': int(expires_in)},
+            headers=self._auth(),
+        )
+        return self._signed_items(resp)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._pid = None
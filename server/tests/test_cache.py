@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from cache import AsyncSingleFlight, SingleFlight, TTLCache
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=5)
+    cache.set('c', 3, expires_at=1010)
+
+    now[0] += 6
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    now[0] += 60
+    assert cache.get('a') is None and cache.get('c') is None
+    assert len(cache) == 0
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 3
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_get_or_load_does_not_cache_none():
+    cache = TTLCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return None
+
+    assert cache.get_or_load('k', loader) is None
+    assert cache.get_or_load('k', loader) is None
+    assert len(calls) == 2
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do('k', slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flights.do('k', slow))) for _ in range(4)]
+    for t in followers:
+        t.start()
+    while flights.coalesced < 4:
+        time.sleep(0.01)
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert results == ['value'] * 5
+    assert len(calls) == 1
+    # Once the call finishes the key is free again
+    assert flights.do('k', lambda: 'next') == 'next'
+
+
+def test_single_flight_shares_the_leaders_exception():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('upstream down')
+
+    errors = []
+
+    def run():
+        try:
+            flights.do('k', failing)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run)]
+    threads[0].start()
+    started.wait(5)
+    threads.append(threading.Thread(target=run))
+    threads[1].start()
+    while flights.coalesced < 1:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(errors) == 2 and errors[0] is errors[1]
+
+
+def test_async_get_or_load_coalesces_misses():
+    cache = TTLCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'value'
+
+    async def main():
+        return await asyncio.gather(*[cache.aget_or_load('k', loader) for _ in range(5)])
+
+    assert asyncio.run(main()) == ['value'] * 5
+    assert len(calls) == 1
+    assert cache.get('k') == 'value'
+    assert cache.stats()['coalesced'] == 4
+
+
+def test_async_single_flight_cancelled_leader_cancels_followers():
+    flights = AsyncSingleFlight()
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do('k', lambda: asyncio.sleep(5)))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do('k', lambda: asyncio.sleep(5)))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        assert await flights.do('k', lambda: asyncio.sleep(0, 'next')) == 'next'
+
+    asyncio.run(main())
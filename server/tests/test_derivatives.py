@@ -0,0 +1,85 @@
+import io
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from derivatives import DerivativePipeline
+
+
+@pytest.fixture
+def tmpdir_only(tmp_path, monkeypatch):
+    # Route the pipeline's temp copies somewhere we can inspect
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def pipeline():
+    stored = []
+    done = threading.Event()
+
+    def store(context, renders):
+        stored.append((context, renders))
+        done.set()
+
+    pipeline = DerivativePipeline(store, workers=1)
+    pipeline.stored, pipeline.stored_event = stored, done
+    yield pipeline
+    if pipeline._procs is not None:
+        pipeline._procs.shutdown(wait=True)
+    pipeline._threads.shutdown(wait=True)
+
+
+def png(width=400, height=300):
+    buf = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buf, 'PNG')
+    buf.seek(0)
+    return buf
+
+
+def leftover(path, timeout=10):
+    # The done callback that removes the copy may run just after result() returns
+    deadline = time.monotonic() + timeout
+    while os.listdir(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return os.listdir(path)
+
+
+def test_render_failure_removes_the_temp_copy(pipeline, tmpdir_only):
+    future = pipeline.submit(io.BytesIO(b'not an image'), {'image_url': 'u/a.png'})
+    with pytest.raises(Exception):
+        future.result(timeout=60)
+    assert leftover(tmpdir_only) == []
+    pipeline._threads.shutdown(wait=True)
+    assert pipeline.stored == []
+
+
+def test_submit_failure_removes_the_temp_copy(pipeline, tmpdir_only, monkeypatch):
+    class Refusing:
+        def submit(self, *args):
+            raise RuntimeError('cannot schedule new futures after shutdown')
+
+    pipeline._pools()
+    monkeypatch.setattr(pipeline, '_pools', lambda: (Refusing(), pipeline._threads))
+    with pytest.raises(RuntimeError):
+        pipeline.submit(png(), {'image_url': 'u/a.png'})
+    assert os.listdir(tmpdir_only) == []
+
+
+def test_pipeline_recovers_after_a_worker_dies(pipeline, tmpdir_only):
+    procs, _ = pipeline._pools()
+    # Kill the only worker; the pool is now broken for every later submit
+    with pytest.raises(Exception):
+        procs.submit(os._exit, 1).result(timeout=60)
+
+    future = pipeline.submit(png(), {'image_url': 'u/a.png'})
+    renders = future.result(timeout=60)
+    assert pipeline._procs is not procs
+    assert {(w, fmt) for w, fmt, _ in renders} == {(320, 'webp'), (320, 'jpeg')}
+    assert pipeline.stored_event.wait(10)
+    assert pipeline.stored[0][0] == {'image_url': 'u/a.png'}
+    assert leftover(tmpdir_only) == []
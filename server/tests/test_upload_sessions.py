@@ -0,0 +1,111 @@
+import io
+import os
+
+import pytest
+
+from upload_sessions import SessionConflict, SessionNotFound, UploadSessions
+
+USER = 'user-1'
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    return UploadSessions(root=str(tmp_path))
+
+
+def upload(sessions, session, data):
+    for index in range(session['chunks']):
+        start = index * session['chunk_size']
+        sessions.write_chunk(session, index, io.BytesIO(data[start:start + session['chunk_size']]))
+
+
+def test_chunks_out_of_order_assemble_in_order(sessions):
+    data = os.urandom(10)
+    session = sessions.create(USER, 'a.png', len(data), chunk_size=4)
+    assert session['chunks'] == 3
+    for index in (2, 0):
+        start = index * 4
+        sessions.write_chunk(session, index, io.BytesIO(data[start:start + 4]))
+    assert sessions.received(session) == [0, 2]
+    assert sessions.received_ranges(session, [0, 2]) == [[0, 4], [8, 10]]
+
+    sessions.write_chunk(session, 1, io.BytesIO(data[4:8]))
+    assert sessions.received_ranges(session, sessions.received(session)) == [[0, 10]]
+    path, digest = sessions.assemble(session)
+    with open(path, 'rb') as f:
+        assert f.read() == data
+    sessions.discard(session['id'])
+    with pytest.raises(SessionNotFound):
+        sessions.get(session['id'], USER)
+
+
+def test_chunk_of_the_wrong_length_is_rejected(sessions):
+    session = sessions.create(USER, 'a.png', 10, chunk_size=4)
+    with pytest.raises(ValueError):
+        sessions.write_chunk(session, 0, io.BytesIO(b'abc'))
+    with pytest.raises(ValueError):
+        sessions.write_chunk(session, 2, io.BytesIO(b'abc'))
+    with pytest.raises(ValueError):
+        sessions.write_chunk(session, 3, io.BytesIO(b'ab'))
+    assert sessions.received(session) == []
+    # Rejected chunks leave no temp files behind
+    assert os.listdir(os.path.join(sessions.root, session['id'])) == ['meta.json']
+
+
+def test_resent_chunk_replaces_the_previous_copy(sessions):
+    session = sessions.create(USER, 'a.png', 4, chunk_size=4)
+    sessions.write_chunk(session, 0, io.BytesIO(b'aaaa'))
+    sessions.write_chunk(session, 0, io.BytesIO(b'bbbb'))
+    path, _ = sessions.assemble(session)
+    with open(path, 'rb') as f:
+        assert f.read() == b'bbbb'
+
+
+def test_assemble_with_missing_chunks_conflicts(sessions):
+    session = sessions.create(USER, 'a.png', 10, chunk_size=4)
+    sessions.write_chunk(session, 1, io.BytesIO(b'abcd'))
+    with pytest.raises(SessionConflict, match=r'missing chunks: \[0, 2\]'):
+        sessions.assemble(session)
+    # The session is still open for the missing chunks
+    assert sessions.get(session['id'], USER)['id'] == session['id']
+
+
+def test_finalizing_session_refuses_chunks_and_second_assemble(sessions):
+    session = sessions.create(USER, 'a.png', 4, chunk_size=4)
+    sessions.write_chunk(session, 0, io.BytesIO(b'abcd'))
+    sessions.assemble(session)
+    with pytest.raises(SessionConflict):
+        sessions.get(session['id'], USER)
+    with pytest.raises(SessionConflict):
+        sessions.write_chunk(session, 0, io.BytesIO(b'abcd'))
+    with pytest.raises(SessionConflict):
+        sessions.assemble(session)
+
+
+def test_release_reopens_the_session(sessions):
+    session = sessions.create(USER, 'a.png', 4, chunk_size=4)
+    sessions.write_chunk(session, 0, io.BytesIO(b'abcd'))
+    sessions.assemble(session)
+    sessions.release(session)
+    assert sessions.get(session['id'], USER)['id'] == session['id']
+    assert 'assembled' not in os.listdir(os.path.join(sessions.root, session['id']))
+    path, _ = sessions.assemble(session)
+    assert os.path.getsize(path) == 4
+
+
+def test_sessions_are_private_and_ids_are_validated(sessions):
+    session = sessions.create(USER, 'a.png', 4, chunk_size=4)
+    with pytest.raises(SessionNotFound):
+        sessions.get(session['id'], 'someone-else')
+    for bad in ('../etc', '', None, 'not-a-uuid'):
+        with pytest.raises(SessionNotFound):
+            sessions.get(bad, USER)
+
+
+def test_sweep_removes_expired_sessions(tmp_path):
+    sessions = UploadSessions(root=str(tmp_path), ttl=60)
+    old = sessions.create(USER, 'a.png', 4, chunk_size=4)
+    path = os.path.join(sessions.root, old['id'])
+    os.utime(path, (0, 0))
+    fresh = sessions.create(USER, 'b.png', 4, chunk_size=4)
+    assert os.listdir(sessions.root) == [fresh['id']]
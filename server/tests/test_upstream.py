@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from upstream import Upstream, UpstreamSaturated
+
+
+def test_full_queue_sheds_instead_of_blocking():
+    upstream = Upstream('test', max_concurrency=2, max_queue=1, queue_timeout=5, retries=0)
+    release = threading.Event()
+    results = []
+
+    def slow():
+        release.wait(5)
+        return 'ok'
+
+    def run():
+        try:
+            results.append(upstream.call(slow, timeout=10))
+        except UpstreamSaturated as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(5)]
+    for t in threads:
+        t.start()
+    # Two calls hold the slots and one waits for a slot; the other two are shed
+    deadline = time.monotonic() + 5
+    while sum(isinstance(r, UpstreamSaturated) for r in results) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert not any(t.is_alive() for t in threads)
+    assert sum(isinstance(r, UpstreamSaturated) for r in results) == 2
+    assert results.count('ok') == 3
+    assert upstream.stats()['shed'] == 2
+    assert upstream.stats()['in_flight'] == 0 and upstream.stats()['waiting'] == 0
+
+
+def test_saturated_upstream_keeps_serving_after_shedding():
+    upstream = Upstream('test', max_concurrency=1, max_queue=1, queue_timeout=0.1, retries=0)
+    release = threading.Event()
+    holder = threading.Thread(target=upstream.call, args=(lambda: release.wait(5),))
+    holder.start()
+    time.sleep(0.05)
+    with pytest.raises(UpstreamSaturated):
+        upstream.call(lambda: 'ok')
+    release.set()
+    holder.join(5)
+    assert upstream.call(lambda: 'ok') == 'ok'
+
+
+def test_sync_and_async_callers_share_one_limit():
+    upstream = Upstream('test', max_concurrency=1, max_queue=4, queue_timeout=0.1, retries=0)
+    release = threading.Event()
+    holder = threading.Thread(target=upstream.call, args=(lambda: release.wait(5),))
+    holder.start()
+    time.sleep(0.05)
+
+    async def ok():
+        return 'ok'
+
+    with pytest.raises(UpstreamSaturated):
+        asyncio.run(upstream.acall(ok))
+    release.set()
+    holder.join(5)
+    assert asyncio.run(upstream.acall(ok)) == 'ok'
+    assert upstream.stats()['in_flight'] == 0 and upstream.stats()['waiting'] == 0
+
+
+def test_hedge_without_a_free_slot_is_declined_not_shed():
+    upstream = Upstream('test', max_concurrency=1, max_queue=1, retries=0, hedge_after_ms=20)
+
+    def slow():
+        time.sleep(0.1)
+        return 'ok'
+
+    assert upstream.call(slow, idempotent=True, hedge=True) == 'ok'
+
+    async def aslow():
+        await asyncio.sleep(0.1)
+        return 'ok'
+
+    assert asyncio.run(upstream.acall(aslow, idempotent=True, hedge=True)) == 'ok'
+    stats = upstream.stats()
+    assert stats['hedge_declined'] == 2
+    assert stats['hedged'] == 0 and stats['shed'] == 0
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import logs
+from serialization import dumps
+
+TRENDING_REFRESH_INTERVAL = float(os.getenv('TRENDING_REFRESH_INTERVAL', '60'))
+# Until the first refresh succeeds it is retried this often
+TRENDING_RETRY_INTERVAL = float(os.getenv('TRENDING_RETRY_INTERVAL', '5'))
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '24'))
+TRENDING_MAX_ITEMS = int(os.getenv('TRENDING_MAX_ITEMS', '1000'))
+TRENDING_LIKE_WEIGHT = float(os.getenv('TRENDING_LIKE_WEIGHT', '1'))
+TRENDING_SAVE_WEIGHT = float(os.getenv('TRENDING_SAVE_WEIGHT', '2'))
+# Interactions older than this many half-lives (< 0.1% of their weight) are skipped
+TRENDING_WINDOW_HALF_LIVES = 10
+
+
+def trending_args(columns):
+    # Arguments for the trending_artworks RPC
+    half_life = TRENDING_HALF_LIFE_HOURS * 3600
+    since = datetime.now(timezone.utc) - timedelta(seconds=half_life * TRENDING_WINDOW_HALF_LIVES)
+    return {
+        'p_since': since.isoformat(),
+        'p_half_life_seconds': half_life,
+        'p_like_weight': TRENDING_LIKE_WEIGHT,
+        'p_save_weight': TRENDING_SAVE_WEIGHT,
+        'p_limit': TRENDING_MAX_ITEMS,
+        'p_columns': list(columns),
+    }
+
+
+class Snapshot:
+    """One computed trending list. Never modified after it is built: each
+    artwork is encoded to JSON once, and a page is a slice of those encodings
+    joined together."""
+
+    __slots__ = ('items', 'computed_at', 'version')
+
+    def __init__(self, rows, computed_at):
+        self.items = tuple(dumps(row) for row in rows)
+        self.computed_at = computed_at
+        self.version = hashlib.sha256(b'\n'.join(self.items)).hexdigest()[:16]
+
+    def __len__(self):
+        return len(self.items)
+
+    def page_json(self, offset, limit):
+        """JSON body for one page: { artworks, total, next_offset, computed_at, version }."""
+        page = self.items[offset:offset + limit]
+        end = offset + len(page)
+        meta = dumps({
+            'total': len(self.items),
+            'next_offset': end if end < len(self.items) else None,
+            'computed_at': self.computed_at,
+            'version': self.version,
+        })
+        return b'{"artworks":[' + b','.join(page) + b'],' + meta[1:]
+
+
+class TrendingFeed:
+    """Trending artworks, recomputed in the background and served from memory.
+
+    `load()` returns the ranked rows (see migrations/create_trending_function.sql).
+    Every `refresh_interval` seconds a new Snapshot is built off to the side and
+    published with a single reference assignment, so readers always see one
+    complete snapshot and never wait on a refresh. A failed refresh keeps the
+    previous snapshot.
+    """
+
+    def __init__(self, load, refresh_interval=TRENDING_REFRESH_INTERVAL):
+        self.load = load
+        self.refresh_interval = refresh_interval
+        self.ready = threading.Event()
+        self.snapshot = Snapshot((), None)
+        self.refreshes = 0
+        self.failures = 0
+        self._pid = None
+
+    def start(self):
+        """Refresh in a background thread. Safe to call per process."""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='trending', daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.failures += 1
+                logs.error('trending.refresh_failed', error=str(e))
+            if not self.ready.is_set():
+                time.sleep(TRENDING_RETRY_INTERVAL)
+                continue
+            if self.refresh_interval <= 0:
+                return
+            time.sleep(self.refresh_interval)
+
+    def refresh(self):
+        started = time.perf_counter()
+        computed_at = datetime.now(timezone.utc).isoformat()
+        snapshot = Snapshot(self.load(), computed_at)
+        self.snapshot = snapshot
+        self.refreshes += 1
+        self.ready.set()
+        logs.info('trending.refreshed', items=len(snapshot), seconds=round(time.perf_counter() - started, 3))
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            'items': len(snapshot),
+            'computed_at': snapshot.computed_at,
+            'version': snapshot.version,
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'ready': self.ready.is_set(),
+        }
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+UPLOAD_SESSION_DIR = os.getenv('UPLOAD_SESSION_DIR') or os.path.join(tempfile.gettempdir(), 'artichoke-upload-sessions')
+UPLOAD_SESSION_TTL = float(os.getenv('UPLOAD_SESSION_TTL', str(24 * 3600)))
+UPLOAD_SESSION_CHUNK_BYTES = int(os.getenv('UPLOAD_SESSION_CHUNK_BYTES', str(8 * 1024 * 1024)))
+UPLOAD_SESSION_MIN_CHUNK_BYTES = 64 * 1024
+UPLOAD_SESSION_MAX_CHUNK_BYTES = 64 * 1024 * 1024
+COPY_CHUNK_SIZE = 256 * 1024
+
+_FINALIZING = '.finalizing'
+
+
+class SessionNotFound(Exception):
+    pass
+
+
+class SessionConflict(Exception):
+    pass
+
+
+class UploadSessions:
+    """Disk-staged state for resumable uploads.
+
+    A session is a directory holding meta.json and one file per received chunk
+    (<index>.part). Chunks are streamed to a temp file and renamed into place, so
+    they may arrive in parallel, out of order, or be re-sent after a dropped
+    connection. Finalizing renames the directory first, which makes it atomic
+    with respect to concurrent chunk writes, even across worker processes.
+    Memory per request is bounded by the copy buffer.
+    """
+
+    def __init__(self, root=UPLOAD_SESSION_DIR, ttl=UPLOAD_SESSION_TTL):
+        self.root = root
+        self.ttl = ttl
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, session_id):
+        # ids are uuid4 hex; anything else cannot name a session (or escape root)
+        try:
+            session_id = uuid.UUID(hex=session_id).hex
+        except (ValueError, TypeError):
+            raise SessionNotFound(session_id)
+        return os.path.join(self.root, session_id)
+
+    def create(self, user_id, filename, size, content_type=None, chunk_size=None, meta=None):
+        self.sweep()
+        chunk_size = int(chunk_size or UPLOAD_SESSION_CHUNK_BYTES)
+        session = {
+            'id': uuid.uuid4().hex,
+            'user_id': user_id,
+            'filename': filename,
+            'size': int(size),
+            'content_type': content_type,
+            'chunk_size': chunk_size,
+            'chunks': max(1, -(-int(size) // chunk_size)),
+            'meta': meta or {},
+            'created_at': time.time(),
+        }
+        path = self._dir(session['id'])
+        os.makedirs(path)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(session, f)
+        return session
+
+    def get(self, session_id, user_id):
+        path = self._dir(session_id)
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                session = json.load(f)
+        except FileNotFoundError:
+            if os.path.isdir(path + _FINALIZING):
+                raise SessionConflict('upload is being finalized')
+            raise SessionNotFound(session_id)
+        if session.get('user_id') != user_id:
+            # Other users' sessions are indistinguishable from missing ones
+            raise SessionNotFound(session_id)
+        return session
+
+    def chunk_length(self, session, index):
+        if not 0 <= index < session['chunks']:
+            raise ValueError(f"chunk index must be between 0 and {session['chunks'] - 1}")
+        start = index * session['chunk_size']
+        return min(session['chunk_size'], session['size'] - start)
+
+    def write_chunk(self, session, index, stream):
+        """Stage one chunk from a readable stream. Returns the bytes written.
+        Raises ValueError if the stream is not exactly the chunk's length.
+        """
+        expected = self.chunk_length(session, index)
+        path = self._dir(session['id'])
+        try:
+            fd, tmp = tempfile.mkstemp(prefix='.', dir=path)
+        except FileNotFoundError:
+            raise SessionConflict('upload is no longer accepting chunks')
+        written = 0
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    data = stream.read(min(COPY_CHUNK_SIZE, expected - written + 1))
+                    if not data:
+                        break
+                    written += len(data)
+                    if written > expected:
+                        break
+                    out.write(data)
+            if written != expected:
+                raise ValueError(f'chunk {index} must be exactly {expected} bytes')
+            # Fails if the session was finalized or aborted meanwhile
+            os.replace(tmp, os.path.join(path, f'{index}.part'))
+        except FileNotFoundError:
+            raise SessionConflict('upload is no longer accepting chunks')
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        return written
+
+    def received(self, session):
+        path = self._dir(session['id'])
+        try:
+            names = os.listdir(path)
+        except FileNotFoundError:
+            raise SessionConflict('upload is no longer accepting chunks')
+        return sorted(int(n[:-5]) for n in names if n.endswith('.part') and n[:-5].isdigit())
+
+    def received_ranges(self, session, received):
+        # Merge received chunks into [start, end) byte ranges
+        ranges = []
+        for index in received:
+            start = index * session['chunk_size']
+            end = start + self.chunk_length(session, index)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        return ranges
+
+    def assemble(self, session):
+        """Claim the session for finalizing and concatenate its chunks into one file.
+        Returns (path, sha256 hex); call `discard` when done with it.
+        Raises SessionConflict if chunks are missing or another request got there first.
+        """
+        path = self._dir(session['id'])
+        missing = sorted(set(range(session['chunks'])) - set(self.received(session)))
+        if missing:
+            raise SessionConflict(f'missing chunks: {missing[:20]}')
+        claimed = path + _FINALIZING
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            raise SessionConflict('upload is already being finalized')
+
+        digest = hashlib.sha256()
+        assembled = os.path.join(claimed, 'assembled')
+        try:
+            with open(assembled, 'wb') as out:
+                for index in range(session['chunks']):
+                    with open(os.path.join(claimed, f'{index}.part'), 'rb') as part:
+                        for data in iter(lambda: part.read(COPY_CHUNK_SIZE), b''):
+                            digest.update(data)
+                            out.write(data)
+        except BaseException:
+            self.release(session)
+            raise
+        return assembled, digest.hexdigest()
+
+    def release(self, session):
+        # Finalizing failed: hand the session back so the client can retry
+        path = self._dir(session['id'])
+        try:
+            os.unlink(os.path.join(path + _FINALIZING, 'assembled'))
+        except FileNotFoundError:
+            pass
+        os.rename(path + _FINALIZING, path)
+
+    def discard(self, session_id):
+        path = self._dir(session_id)
+        shutil.rmtree(path, ignore_errors=True)
+        shutil.rmtree(path + _FINALIZING, ignore_errors=True)
+
+    def sweep(self):
+        """Remove sessions not touched for longer than the TTL."""
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.root):
+            full = os.path.join(self.root, name)
+            try:
+                if os.path.getmtime(full) < cutoff:
+                    shutil.rmtree(full, ignore_errors=True)
+            except FileNotFoundError:
+                pass
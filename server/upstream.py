@@ -0,0 +1,368 @@
+import asyncio
+import contextvars
+import functools
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import httpx
+
+import logs
+
+# Per upstream, per process
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv('UPSTREAM_MAX_CONCURRENCY', '32'))
+# How long a call may wait for a free slot, and how many may wait at once, before
+# further calls are shed with a 503
+UPSTREAM_QUEUE_TIMEOUT = float(os.getenv('UPSTREAM_QUEUE_TIMEOUT', '0.25'))
+UPSTREAM_MAX_QUEUE = int(os.getenv('UPSTREAM_MAX_QUEUE', '64'))
+
+# Deadlines (seconds, covering queueing, every attempt and backoff) by kind of operation
+UPSTREAM_READ_TIMEOUT = float(os.getenv('UPSTREAM_READ_TIMEOUT', '10'))
+UPSTREAM_WRITE_TIMEOUT = float(os.getenv('UPSTREAM_WRITE_TIMEOUT', '20'))
+UPSTREAM_TRANSFER_TIMEOUT = float(os.getenv('UPSTREAM_TRANSFER_TIMEOUT', '300'))
+
+# Retries for idempotent reads: exponential backoff with full jitter
+UPSTREAM_READ_RETRIES = int(os.getenv('UPSTREAM_READ_RETRIES', '2'))
+UPSTREAM_RETRY_BASE = float(os.getenv('UPSTREAM_RETRY_BASE', '0.05'))
+UPSTREAM_RETRY_CAP = float(os.getenv('UPSTREAM_RETRY_CAP', '1.0'))
+
+# Hedged reads send a second copy of a call that has not answered after this many
+# milliseconds and take whichever answers first. 0 disables hedging.
+UPSTREAM_HEDGE_AFTER_MS = float(os.getenv('UPSTREAM_HEDGE_AFTER_MS', '0'))
+
+_deadline = contextvars.ContextVar('upstream_deadline', default=None)
+
+
+class UpstreamError(Exception):
+    status = 502
+
+
+class UpstreamSaturated(UpstreamError):
+    status = 503
+
+
+class DeadlineExceeded(UpstreamError):
+    status = 504
+
+
+class _HedgeDeclined(Exception):
+    # No slot was free for a hedge; the primary attempt carries on alone
+    pass
+
+
+def error_status(e, default=500):
+    # HTTP status for an exception raised while serving a request
+    return e.status if isinstance(e, UpstreamError) else default
+
+
+def is_transient(e):
+    """Failures worth retrying: the call may never have reached the upstream, or
+    the upstream reported a temporary problem."""
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code >= 500
+    return isinstance(e, httpx.TransportError)
+
+
+def _apply_deadline(request):
+    # Tighten every httpx timeout on the request to what is left of the deadline
+    deadline = _deadline.get()
+    if deadline is None:
+        return
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        # Reported like any other httpx timeout; Upstream turns it into DeadlineExceeded
+        raise httpx.PoolTimeout('deadline exceeded before the request was sent', request=request)
+    timeouts = request.extensions.get('timeout') or dict.fromkeys(('connect', 'read', 'write', 'pool'))
+    request.extensions['timeout'] = {k: remaining if v is None else min(v, remaining) for k, v in timeouts.items()}
+
+
+def with_deadline(event_hooks=None):
+    """event_hooks for an httpx.Client that apply the deadline of the Upstream.call
+    they run under. Merged into `event_hooks` if given."""
+    hooks = {k: list(v) for k, v in (event_hooks or {}).items()}
+    hooks.setdefault('request', []).insert(0, _apply_deadline)
+    return hooks
+
+
+class Upstream:
+    """Admission control, deadlines, retries and hedging for calls to one upstream
+    service (PostgREST, Storage).
+
+    At most `max_concurrency` calls are in flight per process, counting sync
+    (`call`) and async (`acall`) callers against the same slots. Others wait up to
+    `queue_timeout` for a slot, and no more than `max_queue` wait at once; the
+    rest fail straight away with UpstreamSaturated (503), so a slow upstream
+    sheds load instead of tying up every worker thread.
+
+    Each call gets a deadline. httpx clients built with `with_deadline` cut their
+    timeouts to what is left of it, and a call that runs out raises
+    DeadlineExceeded (504). Idempotent calls are retried on transient failures
+    with jittered backoff within the same deadline. Hedged calls also send a
+    second attempt when the first is slow, if a slot is free; otherwise the hedge
+    is declined (counted as `hedge_declined`, not `shed`).
+    """
+
+    def __init__(self, name, max_concurrency=UPSTREAM_MAX_CONCURRENCY, queue_timeout=UPSTREAM_QUEUE_TIMEOUT,
+                 max_queue=UPSTREAM_MAX_QUEUE, retries=UPSTREAM_READ_RETRIES, hedge_after_ms=UPSTREAM_HEDGE_AFTER_MS):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.retries = retries
+        self.hedge_after = hedge_after_ms / 1000
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.calls = 0
+        self.shed = 0
+        self.deadline_exceeded = 0
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.hedge_declined = 0
+
+    def _count(self, field, n=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    def _saturated(self):
+        self._count('shed')
+        logs.warning('upstream.shed', upstream=self.name, in_flight=self.in_flight, waiting=self.waiting)
+        return UpstreamSaturated(f'{self.name} is overloaded, try again shortly')
+
+    def _expired(self, op, cause=None):
+        self._count('deadline_exceeded')
+        logs.warning('upstream.deadline_exceeded', upstream=self.name, op=op, error=str(cause) if cause else None)
+        return DeadlineExceeded(f'{self.name} did not answer in time')
+
+    def _enqueue(self):
+        with self._lock:
+            full = self.waiting >= self.max_queue
+            if not full:
+                self.waiting += 1
+        # _saturated() takes the lock again, so it must run after it is released
+        if full:
+            raise self._saturated()
+
+    def _acquire(self, deadline, queue_timeout):
+        self._enqueue()
+        try:
+            wait_for = max(0.0, min(queue_timeout, deadline - time.monotonic()))
+            acquired = self._slots.acquire(timeout=wait_for) if wait_for > 0 else self._slots.acquire(blocking=False)
+        finally:
+            self._count('waiting', -1)
+        if not acquired:
+            raise self._saturated()
+        self._count('in_flight')
+
+    def _acquire_free(self):
+        # Hedges only take a slot that is free right now; they never queue behind
+        # (or shed) other traffic
+        if not self._slots.acquire(blocking=False):
+            self._count('hedge_declined')
+            raise _HedgeDeclined()
+        self._count('hedged')
+        self._count('in_flight')
+
+    def _release(self):
+        self._count('in_flight', -1)
+        self._slots.release()
+
+    def _attempt(self, fn, deadline, queue_timeout, op, hedge=False):
+        if hedge:
+            self._acquire_free()
+        else:
+            self._acquire(deadline, queue_timeout)
+        token = _deadline.set(deadline)
+        try:
+            return fn()
+        except httpx.TimeoutException as e:
+            if time.monotonic() >= deadline:
+                raise self._expired(op, e) from e
+            raise
+        finally:
+            _deadline.reset(token)
+            self._release()
+
+    def _executor(self):
+        # Threads must not be shared across fork(), so build the pool per process
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency + self.max_queue,
+                                                    thread_name_prefix=f'hedge-{self.name}')
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _hedged_attempt(self, fn, deadline, queue_timeout, op):
+        pool = self._executor()
+        primary = pool.submit(self._attempt, fn, deadline, queue_timeout, op)
+        done, _ = wait([primary], timeout=max(0.0, min(self.hedge_after, deadline - time.monotonic())))
+        if done:
+            return primary.result()
+
+        hedge = pool.submit(self._attempt, fn, deadline, 0, op, True)
+        pending, errors = {primary, hedge}, {}
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise self._expired(op)
+            for f in done:
+                if f.exception() is None:
+                    if f is hedge:
+                        self._count('hedge_wins')
+                    return f.result()
+                if not isinstance(f.exception(), _HedgeDeclined):
+                    errors[f] = f.exception()
+        raise errors.get(primary) or errors[hedge]
+
+    def call(self, fn, timeout=UPSTREAM_READ_TIMEOUT, idempotent=False, hedge=False, retry_if=None,
+             queue_timeout=None, op=None):
+        """Run fn() (one upstream request) under admission control and a deadline.
+
+        idempotent: retry on transient errors, and when retry_if(result) is true.
+        hedge: also send a second attempt if the first is slow (idempotent calls only).
+        queue_timeout: override how long to wait for a slot; background jobs can
+        afford to wait where requests should fail fast.
+        """
+        self._count('calls')
+        deadline = time.monotonic() + timeout
+        queue_timeout = self.queue_timeout if queue_timeout is None else queue_timeout
+        attempts = 1 + (self.retries if idempotent else 0)
+        hedged = hedge and idempotent and self.hedge_after > 0
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                if hedged:
+                    result = self._hedged_attempt(fn, deadline, queue_timeout, op)
+                else:
+                    result = self._attempt(fn, deadline, queue_timeout, op)
+                if last or retry_if is None or not retry_if(result):
+                    return result
+                reason = 'retry_if'
+            except UpstreamError:
+                raise
+            except Exception as e:
+                if last or not is_transient(e):
+                    raise
+                result, reason = None, str(e)
+            delay = random.uniform(0, min(UPSTREAM_RETRY_CAP, UPSTREAM_RETRY_BASE * 2 ** attempt))
+            if time.monotonic() + delay >= deadline:
+                if result is not None:
+                    return result
+                raise self._expired(op)
+            self._count('retried')
+            logs.warning('upstream.retry', upstream=self.name, op=op, attempt=attempt + 1, reason=reason)
+            time.sleep(delay)
+
+    async def _async_wait_slot(self, wait_for):
+        if self._slots.acquire(blocking=False):
+            return True
+        if wait_for <= 0:
+            return False
+        # The slots are shared with sync callers, so block for one on a pool thread
+        # rather than on the event loop
+        fut = asyncio.get_running_loop().run_in_executor(
+            self._executor(), functools.partial(self._slots.acquire, timeout=wait_for))
+        try:
+            return await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            # The slot may still be granted after the caller has gone
+            fut.add_done_callback(lambda f: f.cancelled() or not f.result() or self._slots.release())
+            raise
+
+    async def _async_attempt(self, fn, deadline, queue_timeout, op, hedge=False):
+        # Same queue rules and slots as _attempt
+        if hedge:
+            self._acquire_free()
+        else:
+            self._enqueue()
+            try:
+                acquired = await self._async_wait_slot(max(0.0, min(queue_timeout, deadline - time.monotonic())))
+            finally:
+                self._count('waiting', -1)
+            if not acquired:
+                raise self._saturated()
+            self._count('in_flight')
+        try:
+            return await asyncio.wait_for(fn(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError as e:
+            raise self._expired(op, e) from e
+        finally:
+            self._release()
+
+    async def _async_hedged_attempt(self, fn, deadline, queue_timeout, op):
+        primary = asyncio.ensure_future(self._async_attempt(fn, deadline, queue_timeout, op))
+        done, _ = await asyncio.wait({primary}, timeout=max(0.0, min(self.hedge_after, deadline - time.monotonic())))
+        if done:
+            return primary.result()
+        hedge = asyncio.ensure_future(self._async_attempt(fn, deadline, 0, op, True))
+        pending, errors = {primary, hedge}, {}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for f in done:
+                    if f.exception() is None:
+                        if f is hedge:
+                            self._count('hedge_wins')
+                        return f.result()
+                    if not isinstance(f.exception(), _HedgeDeclined):
+                        errors[f] = f.exception()
+            raise errors.get(primary) or errors[hedge]
+        finally:
+            # Unlike threads, the losing attempt can be cancelled
+            for f in pending:
+                f.cancel()
+
+    async def acall(self, fn, timeout=UPSTREAM_READ_TIMEOUT, idempotent=False, hedge=False, retry_if=None,
+                    queue_timeout=None, op=None):
+        """`call` for the async app: fn() returns an awaitable."""
+        self._count('calls')
+        deadline = time.monotonic() + timeout
+        queue_timeout = self.queue_timeout if queue_timeout is None else queue_timeout
+        attempts = 1 + (self.retries if idempotent else 0)
+        hedged = hedge and idempotent and self.hedge_after > 0
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                if hedged:
+                    result = await self._async_hedged_attempt(fn, deadline, queue_timeout, op)
+                else:
+                    result = await self._async_attempt(fn, deadline, queue_timeout, op)
+                if last or retry_if is None or not retry_if(result):
+                    return result
+                reason = 'retry_if'
+            except UpstreamError:
+                raise
+            except Exception as e:
+                if last or not is_transient(e):
+                    raise
+                result, reason = None, str(e)
+            delay = random.uniform(0, min(UPSTREAM_RETRY_CAP, UPSTREAM_RETRY_BASE * 2 ** attempt))
+            if time.monotonic() + delay >= deadline:
+                if result is not None:
+                    return result
+                raise self._expired(op)
+            self._count('retried')
+            logs.warning('upstream.retry', upstream=self.name, op=op, attempt=attempt + 1, reason=reason)
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'calls': self.calls,
+                'shed': self.shed,
+                'deadline_exceeded': self.deadline_exceeded,
+                'retried': self.retried,
+                'hedged': self.hedged,
+                'hedge_wins': self.hedge_wins,
+                'hedge_declined': self.hedge_declined,
+            }